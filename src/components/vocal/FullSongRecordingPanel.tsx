@@ -831,7 +831,7 @@ export default function FullSongRecordingPanel({
                     />
                   </div>
                 )}
-                {useHeadphones && result.isolatedVocalUrl && (
+                {useHeadphones && result.isolatedVocalUrl && result.isolatedVocalUrl !== result.originalRecordingUrl && (
                   <div>
                     <p className="text-xs text-text-muted mb-1">
                       {'ההקלטה שלך (WAV מומר - להשוואה)'}
@@ -7,13 +7,16 @@ Endpoints:
     GET  /api/v1/health                   — Health check
 """
 
+import io
 import json
 import logging
 import os
-import tempfile
+import threading
 import time
 import traceback
-import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import lru_cache
 from datetime import datetime, timezone
 from typing import Optional
 
@@ -35,36 +38,50 @@ logger = logging.getLogger("vocal-service")
 # Modal app & image
 # ---------------------------------------------------------------------------
 
-image = (
+# Two images so each worker class only ships (and imports) what it runs.
+# All of them can import this module and processing.py: fastapi/pydantic are
+# top-level imports here, and processing.py imports the audio-analysis stack.
+_base_image = (
     modal.Image.debian_slim(python_version="3.11")
     .apt_install("ffmpeg", "libsndfile1", "curl", "xz-utils")
-    .run_commands(
-        "curl -fsSL https://nodejs.org/dist/v20.18.1/node-v20.18.1-linux-x64.tar.xz -o /tmp/node.tar.xz && "
-        "tar -xJf /tmp/node.tar.xz --strip-components=1 -C /usr/local && "
-        "rm /tmp/node.tar.xz && "
-        "node --version"
-    )
     .pip_install(
         "fastapi",
-        "uvicorn",
-        "boto3",
-        "anthropic>=0.45.0",
+        "pydantic",
         "numpy",
         "librosa",
         "praat-parselmouth",
-        "fastdtw",
+        "numba",
         "scipy",
-        "torch",
-        "torchaudio",
-        "torchcodec",
         "soundfile",
-        "psycopg2-binary",
-        "pydantic",
-        "demucs",
-        "yt-dlp",
-        "openai",
+        "av",
     )
-    .run_commands("pip uninstall -y yt-dlp-get-pot bgutil-ytdlp-pot-provider 2>/dev/null || true")
+    .env({"NUMBA_CACHE_DIR": "/root/.numba_cache"})
+)
+
+
+def _with_service_code(img: modal.Image) -> modal.Image:
+    """Add the service modules; must be the last step of each image."""
+    return (
+        img
+        # Compile the numba DTW kernel and librosa's numba helpers at build
+        # time so containers load them from the on-disk cache instead of
+        # paying LLVM compile time on the first request.
+        .add_local_file("processing.py", "/root/processing.py", copy=True)
+        .run_commands(
+            "cd /root && python -c 'import processing; "
+            "processing.warmup_dtw(); processing.warmup_features()'"
+        )
+        .add_local_file("scoring.py", "/root/scoring.py")
+        .add_local_file("coaching.py", "/root/coaching.py")
+        .add_local_file("crazy_lyrics.py", "/root/crazy_lyrics.py")
+    )
+
+
+# Demucs workers: torch + pre-downloaded checkpoints, no web/DB stack. boto3
+# lets them fetch inputs straight from S3 instead of through Modal RPC args.
+_gpu_image = _with_service_code(
+    _base_image
+    .pip_install("torch", "torchaudio", "torchcodec", "demucs", "boto3")
     .env({"TORCHAUDIO_BACKEND": "soundfile", "TORCH_HOME": "/root/.cache/torch"})
     # Pre-download all 4 Demucs htdemucs_ft checkpoint files + htdemucs (fast) into the image.
     # Using Python+urllib to guarantee files persist on disk in the image layer.
@@ -78,15 +95,35 @@ image = (
         "print('Files:', os.listdir(d))"
         "\""
     )
-    .add_local_file("processing.py", "/root/processing.py")
-    .add_local_file("scoring.py", "/root/scoring.py")
-    .add_local_file("coaching.py", "/root/coaching.py")
-    .add_local_file("crazy_lyrics.py", "/root/crazy_lyrics.py")
+)
+
+# Web endpoints: everything above minus torch/demucs, plus S3/DB/LLM clients
+# and yt-dlp (with node as its JS runtime).
+_web_image = _with_service_code(
+    _base_image
+    .run_commands(
+        "curl -fsSL https://nodejs.org/dist/v20.18.1/node-v20.18.1-linux-x64.tar.xz -o /tmp/node.tar.xz && "
+        "tar -xJf /tmp/node.tar.xz --strip-components=1 -C /usr/local && "
+        "rm /tmp/node.tar.xz && "
+        "node --version"
+    )
+    .pip_install(
+        "uvicorn",
+        "boto3",
+        "anthropic>=0.45.0",
+        "cachetools",
+        "orjson",
+        "psycopg[binary]>=3.2",
+        "psycopg-pool>=3.2",
+        "yt-dlp",
+        "openai",
+    )
+    .run_commands("pip uninstall -y yt-dlp-get-pot bgutil-ytdlp-pot-provider 2>/dev/null || true")
 )
 
 app = modal.App(
     name="choirmind-vocal-service",
-    image=image,
+    image=_web_image,
     secrets=[modal.Secret.from_name("choirmind-vocal"), modal.Secret.from_name("choirmind-proxy")],
 )
 
@@ -106,6 +143,8 @@ class ProcessVocalRequest(BaseModel):
     recordingDurationMs: int
     useHeadphones: bool = False
     referenceVocalId: Optional[str] = None
+    # featuresFileUrl of referenceVocalId, when the caller already has it
+    referenceFeaturesUrl: Optional[str] = None
     scoringLevel: str = "choir"
 
 
@@ -148,12 +187,186 @@ class CompressAudioRequest(BaseModel):
 # ---------------------------------------------------------------------------
 
 
-def _get_db_conn():
-    """Return a psycopg2 connection using DATABASE_URL."""
-    import psycopg2
+# One pool per container. Created lazily because the module is also imported
+# by GPU workers and by `modal deploy`, where DATABASE_URL may be unset.
+# Sized for the web container's max_inputs concurrent jobs. Jobs borrow a
+# connection per statement (status/stage writes, reference lookups and the
+# final save, partly from worker threads), never for the whole pipeline, so
+# a job holds at most about three at once and the pool never exhausts.
+_DB_POOL = None
+_DB_POOL_LOCK = threading.Lock()
+_DB_POOL_MIN = 1
+_DB_POOL_MAX = 32
+
+
+def _get_db_pool():
+    """Return the container-wide psycopg ConnectionPool."""
+    global _DB_POOL
+    if _DB_POOL is None:
+        with _DB_POOL_LOCK:
+            if _DB_POOL is None:
+                from psycopg_pool import ConnectionPool
+
+                _DB_POOL = ConnectionPool(
+                    os.environ["DATABASE_URL"],
+                    min_size=_DB_POOL_MIN,
+                    max_size=_DB_POOL_MAX,
+                    kwargs={
+                        "autocommit": True,
+                        "prepare_threshold": 5 if _DB_PREPARED else None,
+                    },
+                    name="vocal-service",
+                    open=True,
+                )
+    return _DB_POOL
+
+
+# Server-side prepared statements. psycopg binds parameters server-side and,
+# when enabled, prepares the hot job updates and per-job lookups below on
+# first use (and any other query after 5 executions on a connection), so
+# Postgres parses and plans them once per connection. Off by default: the
+# production DSN goes through Neon's PgBouncer pooler in transaction mode,
+# where a statement prepared on one backend is not visible to the next
+# transaction. Set DB_PREPARED_STATEMENTS=1 for a direct connection.
+_DB_PREPARED = os.environ.get("DB_PREPARED_STATEMENTS") == "1"
+
+_PREPARED_SQL = {
+    "job_set_stage": """
+        UPDATE "VocalAnalysisJob" SET stage = %s
+        WHERE id = %s AND status = 'PROCESSING'
+    """,
+    "job_set_processing": """
+        UPDATE "VocalAnalysisJob"
+        SET status = %s, "startedAt" = %s, attempts = attempts + 1
+        WHERE id = %s
+    """,
+    "job_set_completed": """
+        UPDATE "VocalAnalysisJob"
+        SET status = %s, "completedAt" = %s, "practiceSessionId" = %s
+        WHERE id = %s
+    """,
+    "job_set_failed": """
+        UPDATE "VocalAnalysisJob"
+        SET status = %s, "completedAt" = %s, "errorMessage" = %s
+        WHERE id = %s
+    """,
+    "reference_set_ready": """
+        UPDATE "ReferenceVocal"
+        SET status = %s,
+            "isolatedFileUrl" = %s,
+            "featuresFileUrl" = %s,
+            "durationMs" = %s,
+            "accompanimentFileUrl" = %s,
+            "updatedAt" = %s
+        WHERE id = %s
+    """,
+    "reference_set_processing": """
+        UPDATE "ReferenceVocal" SET status = %s, "updatedAt" = %s
+        WHERE id = %s
+    """,
+    "reference_set_failed": """
+        UPDATE "ReferenceVocal"
+        SET status = %s, "errorMessage" = %s, "updatedAt" = %s
+        WHERE id = %s
+    """,
+    "reference_features_url": """
+        SELECT "featuresFileUrl" FROM "ReferenceVocal"
+        WHERE id = %s AND status = 'READY'
+    """,
+    "song_reference_url": """
+        SELECT s.title, rv."featuresFileUrl"
+        FROM "Song" s
+        LEFT JOIN LATERAL (
+            SELECT "featuresFileUrl" FROM "ReferenceVocal"
+            WHERE "songId" = s.id AND "voicePart" = %s
+              AND "featuresFileUrl" IS NOT NULL AND "featuresFileUrl" <> ''
+            ORDER BY
+                CASE status WHEN 'READY' THEN 0 ELSE 1 END,
+                "createdAt" DESC
+            LIMIT 1
+        ) rv ON TRUE
+        WHERE s.id = %s
+    """,
+    "song_title": """
+        SELECT title FROM "Song" WHERE id = %s
+    """,
+}
+
+
+def _execute_prepared(cur, name: str, params: tuple):
+    """Execute a statement from _PREPARED_SQL, prepared when enabled."""
+    cur.execute(_PREPARED_SQL[name], params, prepare=True if _DB_PREPARED else None)
+
+
+# Small read-mostly lookups (song titles, reference feature URLs) are hit by
+# every job for the same song, so each container keeps them for a few
+# minutes. Misses (None or empty, e.g. the '' featuresFileUrl of a PENDING
+# reference row) are not cached: a reference created by the auto-create
+# fallback or prepare-reference must be visible to the very next job.
+_LOOKUP_CACHE_LOCK = threading.Lock()
+_LOOKUP_CACHE_SIZE = 1024
+_LOOKUP_CACHE_TTL_S = 300
+
+
+@lru_cache(maxsize=1)
+def _get_lookup_cache():
+    """Return the container-wide TTL cache for DB lookups."""
+    from cachetools import TTLCache
+
+    return TTLCache(maxsize=_LOOKUP_CACHE_SIZE, ttl=_LOOKUP_CACHE_TTL_S)
+
+
+def _prime_lookup(key: tuple, value):
+    """Store a value fetched as a by-product of another query."""
+    if value:
+        with _LOOKUP_CACHE_LOCK:
+            _get_lookup_cache()[key] = value
+
+
+def _cached_lookup(key: tuple, fetch):
+    """Return the cached value for *key*, calling *fetch()* on a miss."""
+    cache = _get_lookup_cache()
+    with _LOOKUP_CACHE_LOCK:
+        value = cache.get(key)
+    if value:
+        return value
+    value = fetch()
+    if value:
+        with _LOOKUP_CACHE_LOCK:
+            cache[key] = value
+    return value
+
+
+@contextmanager
+def _get_db_conn(conn=None):
+    """Yield a pooled psycopg connection using DATABASE_URL.
+
+    Pooled connections are in autocommit mode: every statement is its own
+    transaction and costs one round trip (no BEGIN/COMMIT exchange). Group
+    writes that must land together with _db_transaction().
+
+    If *conn* is provided it is yielded as-is. Otherwise a connection is
+    checked out of the pool and returned on exit (discarded by the pool if
+    the server dropped it).
+    """
+    if conn is not None:
+        yield conn
+        return
 
-    dsn = os.environ["DATABASE_URL"]
-    return psycopg2.connect(dsn)
+    with _get_db_pool().connection() as conn:
+        yield conn
+
+
+@contextmanager
+def _db_transaction(conn):
+    """Run the enclosed statements atomically in a single round trip.
+
+    Pipeline mode queues BEGIN, the statements and COMMIT and sends them
+    together when the block exits; an error rolls the whole batch back.
+    Statements inside must not read results (fetch forces a round trip).
+    """
+    with conn.pipeline(), conn.transaction():
+        yield conn
 
 
 def _update_job_status(
@@ -161,69 +374,62 @@ def _update_job_status(
     status: str,
     error_message: Optional[str] = None,
     practice_session_id: Optional[str] = None,
+    conn=None,
 ):
-    """Update VocalAnalysisJob status in PostgreSQL."""
-    conn = _get_db_conn()
-    try:
+    """Update VocalAnalysisJob status in PostgreSQL.
+
+    Runs on *conn* if given (inside its _db_transaction block, if any),
+    otherwise on a pooled connection.
+    """
+    with _get_db_conn(conn) as conn:
         with conn.cursor() as cur:
             now = datetime.now(timezone.utc)
             if status == "PROCESSING":
-                cur.execute(
-                    """
-                    UPDATE "VocalAnalysisJob"
-                    SET status = %s,
-                        "startedAt" = %s,
-                        attempts = attempts + 1
-                    WHERE id = %s
-                    """,
-                    (status, now, job_id),
+                _execute_prepared(
+                    cur, "job_set_processing", (status, now, job_id)
                 )
             elif status == "COMPLETED":
-                cur.execute(
-                    """
-                    UPDATE "VocalAnalysisJob"
-                    SET status = %s,
-                        "completedAt" = %s,
-                        "practiceSessionId" = %s
-                    WHERE id = %s
-                    """,
+                _execute_prepared(
+                    cur,
+                    "job_set_completed",
                     (status, now, practice_session_id, job_id),
                 )
             elif status == "FAILED":
-                cur.execute(
-                    """
-                    UPDATE "VocalAnalysisJob"
-                    SET status = %s,
-                        "completedAt" = %s,
-                        "errorMessage" = %s
-                    WHERE id = %s
-                    """,
-                    (status, now, error_message, job_id),
+                _execute_prepared(
+                    cur, "job_set_failed", (status, now, error_message, job_id)
                 )
-        conn.commit()
-    finally:
-        conn.close()
 
 
 def _update_job_stage(job_id: str, stage: str, conn=None):
     """Update the stage field for progress tracking.
 
-    If conn is provided, reuses it (caller manages lifecycle).
-    Otherwise opens and closes its own connection.
+    If conn is provided, reuses it; otherwise borrows a pooled connection.
+    The write is visible to pollers as soon as it returns.
     """
-    own_conn = conn is None
-    if own_conn:
-        conn = _get_db_conn()
-    try:
+    with _get_db_conn(conn) as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                'UPDATE "VocalAnalysisJob" SET stage = %s WHERE id = %s',
-                (stage, job_id),
-            )
-        conn.commit()
-    finally:
-        if own_conn:
-            conn.close()
+            _execute_prepared(cur, "job_set_stage", (stage, job_id))
+
+
+def _post_job_stage(job_id: str, stage: str, after: Optional[Future] = None) -> Future:
+    """Record a progress stage without making the job wait for it.
+
+    Stages are advisory progress for pollers, so the write goes to the I/O
+    pool on its own pooled connection and failures are only logged. The
+    stage SQL only touches PROCESSING jobs, so a late write can't clobber a
+    finished one. The write waits for *after* (the PROCESSING write or the
+    previous stage's future) so stages land in order; chain the returned
+    future into the next call.
+    """
+    def write():
+        if after is not None:
+            wait([after])
+        try:
+            _update_job_stage(job_id, stage)
+        except Exception as exc:
+            logger.warning("Stage update %s -> %s failed: %s", job_id, stage, exc)
+
+    return _IO_POOL.submit(write)
 
 
 def _update_reference_status(
@@ -234,50 +440,32 @@ def _update_reference_status(
     duration_ms: Optional[int] = None,
     error_message: Optional[str] = None,
     accompaniment_url: Optional[str] = None,
+    conn=None,
 ):
-    """Update ReferenceVocal status in PostgreSQL."""
-    conn = _get_db_conn()
-    try:
+    """Update ReferenceVocal status in PostgreSQL.
+
+    Runs on *conn* if given (inside its _db_transaction block, if any),
+    otherwise on a pooled connection.
+    """
+    with _get_db_conn(conn) as conn:
         with conn.cursor() as cur:
             now = datetime.now(timezone.utc)
             if status == "READY":
-                cur.execute(
-                    """
-                    UPDATE "ReferenceVocal"
-                    SET status = %s,
-                        "isolatedFileUrl" = %s,
-                        "featuresFileUrl" = %s,
-                        "durationMs" = %s,
-                        "accompanimentFileUrl" = %s,
-                        "updatedAt" = %s
-                    WHERE id = %s
-                    """,
+                _execute_prepared(
+                    cur,
+                    "reference_set_ready",
                     (status, isolated_url, features_url, duration_ms, accompaniment_url, now, ref_id),
                 )
             elif status == "PROCESSING":
-                cur.execute(
-                    """
-                    UPDATE "ReferenceVocal"
-                    SET status = %s,
-                        "updatedAt" = %s
-                    WHERE id = %s
-                    """,
-                    (status, now, ref_id),
+                _execute_prepared(
+                    cur, "reference_set_processing", (status, now, ref_id)
                 )
             elif status == "FAILED":
-                cur.execute(
-                    """
-                    UPDATE "ReferenceVocal"
-                    SET status = %s,
-                        "errorMessage" = %s,
-                        "updatedAt" = %s
-                    WHERE id = %s
-                    """,
+                _execute_prepared(
+                    cur,
+                    "reference_set_failed",
                     (status, error_message, now, ref_id),
                 )
-        conn.commit()
-    finally:
-        conn.close()
 
 
 def _create_vocal_practice_session(
@@ -292,6 +480,8 @@ def _create_vocal_practice_session(
     xp_earned: int,
     isolated_vocal_url: Optional[str] = None,
     original_recording_url: Optional[str] = None,
+    complete_job_id: Optional[str] = None,
+    conn=None,
 ) -> str:
     """Insert a VocalPracticeSession row and return its id.
 
@@ -300,7 +490,15 @@ def _create_vocal_practice_session(
     can retrieve the playback URL:
 
         {"sections": [...], "isolatedVocalUrl": "https://..."}
+
+    When *complete_job_id* is given, the same statement also marks that
+    VocalAnalysisJob COMPLETED and links it to the new session (one round
+    trip, no window where either row exists without the other).
+
+    Runs on *conn* if given, otherwise on a pooled connection.
     """
+    import uuid
+
     session_id = str(uuid.uuid4())
 
     # Build the sectionScores JSON — always use wrapper format to include
@@ -312,14 +510,12 @@ def _create_vocal_practice_session(
         wrapper["isolatedVocalUrl"] = isolated_vocal_url
     if original_recording_url:
         wrapper["originalRecordingUrl"] = original_recording_url
-    section_scores_json = json.dumps(wrapper, ensure_ascii=False)
+    section_scores_json = _json_dumps(wrapper).decode()
 
-    conn = _get_db_conn()
-    try:
+    with _get_db_conn(conn) as conn:
         with conn.cursor() as cur:
             now = datetime.now(timezone.utc)
-            cur.execute(
-                """
+            insert_sql = """
                 INSERT INTO "VocalPracticeSession" (
                     id, "userId", "songId", "voicePart", "recordingS3Key",
                     "referenceVocalId", "overallScore", "pitchScore",
@@ -333,38 +529,51 @@ def _create_vocal_practice_session(
                     %s, %s, %s, %s,
                     %s
                 )
-                """,
-                (
-                    session_id,
-                    user_id,
-                    song_id,
-                    voice_part,
-                    recording_s3_key,
-                    reference_vocal_id,
-                    scores["overallScore"],
-                    scores["pitchScore"],
-                    scores["timingScore"],
-                    scores["dynamicsScore"],
-                    section_scores_json,
-                    json.dumps(scores.get("problemAreas", []), ensure_ascii=False),
-                    json.dumps(coaching_tips, ensure_ascii=False),
-                    xp_earned,
-                    duration_ms,
-                    now,
-                ),
+            """
+            params = (
+                session_id,
+                user_id,
+                song_id,
+                voice_part,
+                recording_s3_key,
+                reference_vocal_id,
+                scores["overallScore"],
+                scores["pitchScore"],
+                scores["timingScore"],
+                scores["dynamicsScore"],
+                section_scores_json,
+                _json_dumps(scores.get("problemAreas", [])).decode(),
+                _json_dumps(coaching_tips).decode(),
+                xp_earned,
+                duration_ms,
+                now,
             )
-        conn.commit()
-    finally:
-        conn.close()
+            if complete_job_id:
+                cur.execute(
+                    f"""
+                    WITH new_session AS ({insert_sql} RETURNING id)
+                    UPDATE "VocalAnalysisJob"
+                    SET status = 'COMPLETED',
+                        "completedAt" = %s,
+                        "practiceSessionId" = (SELECT id FROM new_session)
+                    WHERE id = %s
+                    """,
+                    params + (now, complete_job_id),
+                )
+            else:
+                cur.execute(insert_sql, params)
 
     return session_id
 
 
-def _refund_quota(user_id: str, duration_ms: int):
-    """Refund vocal quota seconds on processing failure."""
+def _refund_quota(user_id: str, duration_ms: int, conn=None):
+    """Refund vocal quota seconds on processing failure.
+
+    Runs on *conn* if given (inside its _db_transaction block, if any),
+    otherwise on a pooled connection.
+    """
     refund_s = max(1, duration_ms // 1000)
-    conn = _get_db_conn()
-    try:
+    with _get_db_conn(conn) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -375,16 +584,16 @@ def _refund_quota(user_id: str, duration_ms: int):
                 """,
                 (refund_s, datetime.now(timezone.utc), user_id),
             )
-        conn.commit()
-        logger.info("Refunded %ds quota for user %s", refund_s, user_id)
-    finally:
-        conn.close()
+    logger.info("Refunded %ds quota for user %s", refund_s, user_id)
 
 
-def _award_xp(user_id: str, xp: int):
-    """Add XP to user record."""
-    conn = _get_db_conn()
-    try:
+def _award_xp(user_id: str, xp: int, conn=None):
+    """Add XP to user record.
+
+    Runs on *conn* if given (inside its _db_transaction block, if any),
+    otherwise on a pooled connection.
+    """
+    with _get_db_conn(conn) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -395,72 +604,58 @@ def _award_xp(user_id: str, xp: int):
                 """,
                 (xp, datetime.now(timezone.utc), user_id),
             )
-        conn.commit()
-    finally:
-        conn.close()
 
 
-def _get_reference_features_url(ref_id: str) -> Optional[str]:
-    """Fetch the featuresFileUrl for a ReferenceVocal."""
-    conn = _get_db_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT "featuresFileUrl" FROM "ReferenceVocal"
-                WHERE id = %s AND status = 'READY'
-                """,
-                (ref_id,),
-            )
-            row = cur.fetchone()
-            return row[0] if row else None
-    finally:
-        conn.close()
+def _get_reference_features_url(ref_id: str, conn=None) -> Optional[str]:
+    """Fetch the featuresFileUrl for a ReferenceVocal (TTL-cached)."""
+    def fetch():
+        with _get_db_conn(conn) as db:
+            with db.cursor() as cur:
+                _execute_prepared(cur, "reference_features_url", (ref_id,))
+                row = cur.fetchone()
+                return row[0] if row else None
 
+    return _cached_lookup(("reference_features_url", ref_id), fetch)
 
-def _find_reference_for_song(song_id: str, voice_part: str) -> Optional[str]:
+
+def _find_reference_for_song(song_id: str, voice_part: str, conn=None) -> Optional[str]:
     """Find a ReferenceVocal with features for the given song + voice part.
 
     Prefers READY references, but also returns features from PENDING/PROCESSING
     if available (e.g. from a prior run that populated featuresFileUrl).
+    TTL-cached. The same round trip also fetches the song title and primes
+    _get_song_title's cache entry with it.
     """
-    conn = _get_db_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT "featuresFileUrl" FROM "ReferenceVocal"
-                WHERE "songId" = %s AND "voicePart" = %s
-                  AND "featuresFileUrl" IS NOT NULL
-                ORDER BY
-                    CASE status WHEN 'READY' THEN 0 ELSE 1 END,
-                    "createdAt" DESC
-                LIMIT 1
-                """,
-                (song_id, voice_part),
-            )
-            row = cur.fetchone()
-            return row[0] if row else None
-    finally:
-        conn.close()
+    def fetch():
+        with _get_db_conn(conn) as db:
+            with db.cursor() as cur:
+                _execute_prepared(cur, "song_reference_url", (voice_part, song_id))
+                row = cur.fetchone()
+                if not row:
+                    return None
+                _prime_lookup(("song_title", song_id), row[0])
+                return row[1]
+
+    return _cached_lookup(("song_reference_url", song_id, voice_part), fetch)
 
 
 def _get_song_title(song_id: str, conn=None) -> Optional[str]:
-    """Fetch song title for coaching context."""
-    own_conn = conn is None
-    if own_conn:
-        conn = _get_db_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                'SELECT title FROM "Song" WHERE id = %s',
-                (song_id,),
-            )
-            row = cur.fetchone()
-            return row[0] if row else None
-    finally:
-        if own_conn:
-            conn.close()
+    """Fetch song title for coaching context (TTL-cached)."""
+    def fetch():
+        with _get_db_conn(conn) as db:
+            with db.cursor() as cur:
+                _execute_prepared(cur, "song_title", (song_id,))
+                row = cur.fetchone()
+                return row[0] if row else None
+
+    return _cached_lookup(("song_title", song_id), fetch)
+
+
+# Auto-creations in flight per (songId, voicePart): concurrent first jobs for
+# a song part without a reference wait for one Demucs run instead of each
+# starting their own.
+_AUTO_CREATE_LOCK = threading.Lock()
+_AUTO_CREATE_INFLIGHT: dict[tuple, Future] = {}
 
 
 def _auto_create_reference(song_id: str, voice_part: str) -> Optional[dict]:
@@ -468,13 +663,41 @@ def _auto_create_reference(song_id: str, voice_part: str) -> Optional[dict]:
 
     Looks up the AudioTrack table for the song, downloads the audio,
     runs Demucs vocal isolation, extracts features, uploads results to S3,
-    and creates a ReferenceVocal DB record with status=READY.
+    and creates a ReferenceVocal DB record with status=READY. The new
+    reference is primed into the lookup and features caches, so later jobs
+    on this container resolve it without a query or download.
 
     Returns a dict with 'features' and 'referenceVocalId', or None if
     no audio tracks exist for this song.
     """
-    conn = _get_db_conn()
+    key = (song_id, voice_part)
+    with _AUTO_CREATE_LOCK:
+        pending = _AUTO_CREATE_INFLIGHT.get(key)
+        owner = pending is None
+        if owner:
+            pending = _AUTO_CREATE_INFLIGHT[key] = Future()
+    if not owner:
+        logger.info("Waiting for in-flight reference creation: %s/%s", song_id, voice_part)
+        return pending.result()
+
     try:
+        result = _create_reference_from_tracks(song_id, voice_part)
+    except BaseException as exc:
+        pending.set_exception(exc)
+        raise
+    else:
+        pending.set_result(result)
+    finally:
+        with _AUTO_CREATE_LOCK:
+            _AUTO_CREATE_INFLIGHT.pop(key, None)
+    return result
+
+
+def _create_reference_from_tracks(song_id: str, voice_part: str) -> Optional[dict]:
+    """_auto_create_reference without the in-flight deduplication."""
+    import uuid
+
+    with _get_db_conn() as conn:
         with conn.cursor() as cur:
             # Prefer matching voice part, fall back to 'full' or 'mix'
             cur.execute(
@@ -497,55 +720,38 @@ def _auto_create_reference(song_id: str, voice_part: str) -> Optional[dict]:
                 logger.info("No audio tracks found for song %s", song_id)
                 return None
             track_id, track_voice_part, file_url = row
-    finally:
-        conn.close()
 
     logger.info(
         "Auto-creating reference from track %s (%s)", track_id, track_voice_part
     )
 
-    # Download the audio track
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        src_path = tmp.name
-    _download_url_from_s3(file_url, src_path)
-
-    with open(src_path, "rb") as f:
-        audio_bytes = f.read()
-    os.unlink(src_path)
-
-    # Run Demucs to isolate vocals
-    demucs_result = run_demucs_isolation.remote(audio_bytes, "auto_reference.wav")
-    vocal_bytes = demucs_result["vocals"]
-
-    # Extract features
-    features = run_feature_extraction.remote(vocal_bytes, "auto_reference_vocal.wav")
+    # Run Demucs to isolate vocals and extract their features in one GPU
+    # call (the worker downloads the track)
+    demucs_result = DemucsWorker().isolate_s3.remote(
+        _s3_key_from_url(file_url), with_features=True
+    )
+    features = demucs_result["features"]
 
-    # Upload to S3
+    # Upload the isolated WAV and the features file in parallel
     ref_id = str(uuid.uuid4())
     s3_prefix = f"reference-vocals/{song_id}/{voice_part}"
 
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        tmp.write(vocal_bytes)
-        tmp_vocal_path = tmp.name
-    try:
-        isolated_url = _upload_to_s3(
-            tmp_vocal_path,
-            f"{s3_prefix}/{ref_id}_isolated.wav",
-            content_type="audio/wav",
-        )
-    finally:
-        os.unlink(tmp_vocal_path)
-
-    features_url = _upload_json_to_s3(
+    future_isolated = _IO_POOL.submit(
+        _upload_bytes_to_s3,
+        demucs_result["vocals"],
+        f"{s3_prefix}/{ref_id}_isolated.wav",
+        "audio/wav",
+    )
+    features_url = _upload_features_to_s3(
         features,
-        f"{s3_prefix}/{ref_id}_features.json",
+        f"{s3_prefix}/{ref_id}_features.npz",
     )
+    isolated_url = future_isolated.result()
 
     duration_ms = int(features["duration_s"] * 1000)
 
     # Create or update ReferenceVocal record (handle duplicate from backfill)
-    conn = _get_db_conn()
-    try:
+    with _get_db_conn() as conn:
         with conn.cursor() as cur:
             now = datetime.now(timezone.utc)
             cur.execute(
@@ -572,9 +778,9 @@ def _auto_create_reference(song_id: str, voice_part: str) -> Optional[dict]:
             )
             row = cur.fetchone()
             actual_id = row[0] if row else ref_id
-        conn.commit()
-    finally:
-        conn.close()
+
+    _prime_lookup(("song_reference_url", song_id, voice_part), features_url)
+    _prime_reference_features(features_url, features)
 
     logger.info(
         "Auto-created/updated reference %s for song %s part %s",
@@ -588,44 +794,94 @@ def _auto_create_reference(song_id: str, voice_part: str) -> Optional[dict]:
 # ---------------------------------------------------------------------------
 
 
+# One client per container, built on first use. Guarded by a lock rather
+# than lru_cache so concurrent first requests don't each resolve credentials
+# and build their own client and connection pool.
+_S3_CLIENT = None
+_S3_CLIENT_LOCK = threading.Lock()
+
+
 def _get_s3_client():
-    """Create a boto3 S3 client from env vars."""
-    import boto3
-
-    return boto3.client(
-        "s3",
-        region_name=os.environ.get("AWS_REGION", "eu-west-1"),
-        aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
-        aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
+    """Return the container-wide boto3 S3 client (built once from env vars).
+
+    boto3 clients are thread-safe; sharing one keeps HTTPS connections alive
+    across calls instead of re-handshaking TLS on every request. The pool
+    covers max_inputs concurrent jobs each fanning out ranged GETs or
+    multipart uploads; adaptive retries back off client-side on S3 throttling.
+    """
+    global _S3_CLIENT
+    if _S3_CLIENT is None:
+        with _S3_CLIENT_LOCK:
+            if _S3_CLIENT is None:
+                import boto3
+                from botocore.config import Config
+
+                _S3_CLIENT = boto3.session.Session().client(
+                    "s3",
+                    region_name=os.environ.get("AWS_REGION", "eu-west-1"),
+                    aws_access_key_id=os.environ["AWS_ACCESS_KEY_ID"],
+                    aws_secret_access_key=os.environ["AWS_SECRET_ACCESS_KEY"],
+                    config=Config(
+                        tcp_keepalive=True,
+                        max_pool_connections=64,
+                        retries={"mode": "adaptive", "max_attempts": 5},
+                    ),
+                )
+    return _S3_CLIENT
+
+
+@lru_cache(maxsize=1)
+def _get_s3_transfer_config():
+    """Multipart settings for large WAV transfers (isolated vocals are tens of MB).
+
+    Anything over 5 MB (the S3 minimum part size) is split into 8 MB parts
+    uploaded on up to 16 threads instead of one serial PUT. A full-length
+    stereo stem (~10 MB per minute) has more than 8 parts, so 16 threads
+    move all of them at once.
+    """
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=5 * 1024 * 1024,
+        multipart_chunksize=8 * 1024 * 1024,
+        max_concurrency=16,
+        use_threads=True,
     )
 
 
-def _convert_to_wav(audio_bytes: bytes) -> bytes:
-    """Convert any audio format (webm, opus, mp3, etc.) to WAV using ffmpeg.
+def _decode_audio(audio_bytes: bytes, sr: int = 44100):
+    """Decode any audio format (webm, opus, mp3, etc.) to mono int16 PCM.
 
-    ffmpeg is much faster than librosa for simple format conversion
-    (no Python-level decoding/resampling needed).
+    Uses PyAV (libavformat/libavcodec linked in-process), so there is no
+    ffmpeg fork/exec and no temp files. Returns a 1-D numpy int16 array.
     """
-    import subprocess
+    import av
+    import numpy as np
 
-    with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as tmp_in:
-        tmp_in.write(audio_bytes)
-        tmp_in_path = tmp_in.name
+    chunks = []
+    with av.open(io.BytesIO(audio_bytes)) as container:
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=sr)
+        for frame in container.decode(stream):
+            for out in resampler.resample(frame):
+                chunks.append(out.to_ndarray().reshape(-1))
+        # Flush samples buffered inside the resampler
+        for out in resampler.resample(None):
+            chunks.append(out.to_ndarray().reshape(-1))
+
+    if not chunks:
+        return np.zeros(0, dtype=np.int16)
+    return np.concatenate(chunks)
 
-    tmp_out_path = tmp_in_path.replace(".webm", ".wav")
-    try:
-        subprocess.run(
-            ["ffmpeg", "-y", "-i", tmp_in_path,
-             "-ar", "44100", "-ac", "1", "-acodec", "pcm_s16le", tmp_out_path],
-            check=True, capture_output=True, timeout=30,
-        )
-        with open(tmp_out_path, "rb") as f:
-            return f.read()
-    finally:
-        if os.path.exists(tmp_in_path):
-            os.unlink(tmp_in_path)
-        if os.path.exists(tmp_out_path):
-            os.unlink(tmp_out_path)
+
+def _is_silent(pcm) -> bool:
+    """True if int16 PCM has (almost) no signal: mean |x| below the gate."""
+    import numpy as np
+
+    if len(pcm) == 0:
+        return True
+    mean_abs = float(np.abs(pcm, dtype=np.float32).mean()) / 32768.0
+    return mean_abs < _SILENCE_MEAN_ABS
 
 
 def _download_from_s3(s3_key: str, local_path: str):
@@ -633,21 +889,69 @@ def _download_from_s3(s3_key: str, local_path: str):
     bucket = os.environ["AWS_S3_BUCKET"]
     s3 = _get_s3_client()
     logger.info("Downloading s3://%s/%s -> %s", bucket, s3_key, local_path)
-    s3.download_file(bucket, s3_key, local_path)
+    s3.download_file(bucket, s3_key, local_path, Config=_get_s3_transfer_config())
+
 
+# Objects larger than one part are fetched as parallel ranged GETs.
+_S3_GET_PART_SIZE = 8 * 1024 * 1024
+_S3_GET_MAX_WORKERS = 16
 
-def _download_url_from_s3(url: str, local_path: str):
-    """Download a file given its full S3 URL or just the key."""
+
+def _download_bytes_from_s3(s3_key: str) -> bytes | bytearray:
+    """Download an object from S3 straight into memory.
+
+    The first part is requested as a ranged GET; its Content-Range reveals
+    the total size (no separate HEAD). Small objects finish in that single
+    request, larger ones fetch the remaining parts in parallel into a
+    preallocated buffer, which is returned as is (no bytes() copy).
+    """
+    bucket = os.environ["AWS_S3_BUCKET"]
+    s3 = _get_s3_client()
+    logger.info("Downloading s3://%s/%s -> memory", bucket, s3_key)
+
+    from botocore.exceptions import ClientError
+
+    part = _S3_GET_PART_SIZE
+    try:
+        resp = s3.get_object(Bucket=bucket, Key=s3_key, Range=f"bytes=0-{part - 1}")
+    except ClientError as exc:
+        # Zero-byte objects can't satisfy any range
+        if exc.response.get("Error", {}).get("Code") != "InvalidRange":
+            raise
+        return s3.get_object(Bucket=bucket, Key=s3_key)["Body"].read()
+    first = resp["Body"].read()
+    content_range = resp.get("ContentRange")  # "bytes 0-8388607/12345678"
+    total = int(content_range.rsplit("/", 1)[1]) if content_range else len(first)
+    if total <= len(first):
+        return first
+
+    buf = bytearray(total)
+    buf[: len(first)] = first
+
+    def fetch(start: int):
+        end = min(start + part, total) - 1
+        r = s3.get_object(Bucket=bucket, Key=s3_key, Range=f"bytes={start}-{end}")
+        buf[start : end + 1] = r["Body"].read()
+
+    starts = range(len(first), total, part)
+    with ThreadPoolExecutor(max_workers=min(_S3_GET_MAX_WORKERS, len(starts))) as pool:
+        list(pool.map(fetch, starts))
+    return buf
+
+
+def _s3_key_from_url(url: str) -> str:
+    """Return the object key for a full S3 URL or a bare key."""
     # Handle both https://bucket.s3.region.amazonaws.com/key and bare keys
     if url.startswith("http"):
-        # Extract key from URL
         from urllib.parse import urlparse
 
-        parsed = urlparse(url)
-        s3_key = parsed.path.lstrip("/")
-    else:
-        s3_key = url
-    _download_from_s3(s3_key, local_path)
+        return urlparse(url).path.lstrip("/")
+    return url
+
+
+def _download_url_bytes_from_s3(url: str) -> bytes | bytearray:
+    """Download an object into memory given its full S3 URL or just the key."""
+    return _download_bytes_from_s3(_s3_key_from_url(url))
 
 
 def _upload_to_s3(local_path: str, s3_key: str, content_type: str = "application/octet-stream") -> str:
@@ -661,31 +965,199 @@ def _upload_to_s3(local_path: str, s3_key: str, content_type: str = "application
         bucket,
         s3_key,
         ExtraArgs={"ContentType": content_type},
+        Config=_get_s3_transfer_config(),
     )
     return f"https://{bucket}.s3.{region}.amazonaws.com/{s3_key}"
 
 
-def _upload_json_to_s3(data: dict, s3_key: str) -> str:
-    """Serialise a dict to JSON and upload to S3. Returns the S3 URL."""
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
-        tmp_path = f.name
+def _upload_bytes_to_s3(data: bytes, s3_key: str, content_type: str = "application/octet-stream") -> str:
+    """Upload an in-memory payload to S3. Returns the S3 URL."""
+    bucket = os.environ["AWS_S3_BUCKET"]
+    region = os.environ.get("AWS_REGION", "eu-west-1")
+    s3 = _get_s3_client()
+    logger.info("Uploading %.1fMB -> s3://%s/%s", len(data) / 1e6, bucket, s3_key)
+    s3.upload_fileobj(
+        io.BytesIO(data),
+        bucket,
+        s3_key,
+        ExtraArgs={"ContentType": content_type},
+        Config=_get_s3_transfer_config(),
+    )
+    return f"https://{bucket}.s3.{region}.amazonaws.com/{s3_key}"
+
+
+def _json_dumps(data) -> bytes:
+    """Serialise to compact UTF-8 JSON bytes with orjson.
+
+    NaN/inf become null; _parse_features maps null pitch frames back to NaN.
+    Non-string dict keys (e.g. int section indices) are stringified like
+    the stdlib encoder does instead of raising.
+    """
+    import orjson
+
+    return orjson.dumps(
+        data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+
+
+def _json_loads(raw: bytes):
+    """Parse JSON with orjson, falling back to json for legacy NaN tokens."""
+    import orjson
+
     try:
-        return _upload_to_s3(tmp_path, s3_key, content_type="application/json")
-    finally:
-        os.unlink(tmp_path)
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
+
+
+# Reference features are written as .npz (processing.features_to_npz): binary
+# arrays load far faster than JSON floats parse. Older .json files are still
+# read.
+_NPZ_MAGIC = b"PK\x03\x04"
+
+
+def _parse_features(raw: bytes) -> dict:
+    """Parse a features file (.npz, or JSON with null for unvoiced pitch).
+
+    Either way the result holds numpy arrays, as extract_features_from_array
+    returns.
+    """
+    from processing import features_from_lists, features_from_npz
+
+    if raw.startswith(_NPZ_MAGIC):
+        return features_from_npz(raw)
+    return features_from_lists(_json_loads(raw))
+
+
+def _upload_features_to_s3(features: dict, s3_key: str) -> str:
+    """Upload a features dict as .npz (see _parse_features). Returns the S3 URL."""
+    from processing import features_to_npz
 
+    _invalidate_reference_features(s3_key)
+    return _upload_bytes_to_s3(
+        features_to_npz(features), s3_key, content_type="application/octet-stream"
+    )
+
+
+# Parsed reference features are a few MB in memory and shared by every user
+# singing the same song. Entries are weighed by the size of their arrays
+# (the file size no longer tracks it); callers must treat the returned dict
+# as read-only.
+_FEATURES_CACHE_LOCK = threading.Lock()
+_FEATURES_CACHE_BYTES = 200 * 1024 * 1024
+_FEATURES_CACHE_TTL_S = 3600
+# Downloads in flight per S3 key, so concurrent misses for the same song (a
+# cold container taking a burst of jobs) share one GET instead of racing.
+_FEATURES_INFLIGHT: dict[str, Future] = {}
+
+
+@lru_cache(maxsize=1)
+def _get_features_cache():
+    """Return the container-wide cache of parsed reference features."""
+    from cachetools import TTLCache
+
+    return TTLCache(
+        maxsize=_FEATURES_CACHE_BYTES,
+        ttl=_FEATURES_CACHE_TTL_S,
+        getsizeof=lambda entry: entry[0],
+    )
+
+
+def _features_size(features: dict) -> int:
+    """Memory held by the arrays of a parsed features dict."""
+    return sum(v.nbytes for v in features.values() if hasattr(v, "nbytes"))
+
+
+def _load_reference_features(features_url: str) -> dict:
+    """Download and parse reference features, cached per S3 key."""
+    key = _s3_key_from_url(features_url)
+    cache = _get_features_cache()
+    with _FEATURES_CACHE_LOCK:
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1]
+        pending = _FEATURES_INFLIGHT.get(key)
+        if pending is None:
+            pending = _FEATURES_INFLIGHT[key] = Future()
+            owner = True
+        else:
+            owner = False
+    if not owner:
+        return pending.result()
 
-def _download_json_from_s3(url_or_key: str) -> dict:
-    """Download and parse a JSON file from S3."""
-    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
-        tmp_path = f.name
     try:
-        _download_url_from_s3(url_or_key, tmp_path)
-        with open(tmp_path, "r") as f:
-            return json.load(f)
-    finally:
-        os.unlink(tmp_path)
+        features = _parse_features(_download_url_bytes_from_s3(features_url))
+        size = _features_size(features)
+    except BaseException as exc:
+        with _FEATURES_CACHE_LOCK:
+            if _FEATURES_INFLIGHT.get(key) is pending:
+                del _FEATURES_INFLIGHT[key]
+        pending.set_exception(exc)
+        raise
+    with _FEATURES_CACHE_LOCK:
+        if size <= _FEATURES_CACHE_BYTES:
+            cache[key] = (size, features)
+        if _FEATURES_INFLIGHT.get(key) is pending:
+            del _FEATURES_INFLIGHT[key]
+    pending.set_result(features)
+    return features
+
+
+def _prime_reference_features(features_url: str, features: dict):
+    """Cache features this container just uploaded (saves reading them back)."""
+    size = _features_size(features)
+    if size <= _FEATURES_CACHE_BYTES:
+        with _FEATURES_CACHE_LOCK:
+            _get_features_cache()[_s3_key_from_url(features_url)] = (size, features)
+
+
+def _invalidate_reference_features(url_or_key: str):
+    """Drop a cached features entry (its S3 object is being rewritten)."""
+    key = _s3_key_from_url(url_or_key)
+    with _FEATURES_CACHE_LOCK:
+        _get_features_cache().pop(key, None)
+        _FEATURES_INFLIGHT.pop(key, None)
+
+
+# Resolved references per (referenceVocalId or "", songId, voicePart), so a
+# repeat singer of the same song part skips the URL lookups and the features
+# cache probe. Holds the same read-only dicts as the features cache.
+_REFERENCE_CACHE_LOCK = threading.Lock()
+_REFERENCE_CACHE_SIZE = 1024
+_REFERENCE_CACHE_TTL_S = 600
+
+
+@lru_cache(maxsize=1)
+def _get_reference_cache():
+    """Return the container-wide cache of resolved reference features."""
+    from cachetools import TTLCache
+
+    return TTLCache(maxsize=_REFERENCE_CACHE_SIZE, ttl=_REFERENCE_CACHE_TTL_S)
+
+
+def _get_cached_reference(key: tuple) -> Optional[tuple]:
+    """Return the cached (features, reference_vocal_id) for *key*, if any."""
+    with _REFERENCE_CACHE_LOCK:
+        return _get_reference_cache().get(key)
+
+
+def _cache_reference(key: tuple, features: dict, reference_vocal_id: Optional[str]):
+    """Remember the reference resolved for *key*."""
+    with _REFERENCE_CACHE_LOCK:
+        _get_reference_cache()[key] = (features, reference_vocal_id)
+
+
+def _invalidate_reference(song_id: str, voice_part: str, reference_vocal_id: str):
+    """Forget resolved references for a song part after it was (re)prepared."""
+    with _REFERENCE_CACHE_LOCK:
+        cache = _get_reference_cache()
+        for key in list(cache.keys()):
+            if key[0] == reference_vocal_id or key[1:] == (song_id, voice_part):
+                cache.pop(key, None)
+    with _LOOKUP_CACHE_LOCK:
+        lookups = _get_lookup_cache()
+        lookups.pop(("reference_features_url", reference_vocal_id), None)
+        lookups.pop(("song_reference_url", song_id, voice_part), None)
 
 
 # ---------------------------------------------------------------------------
@@ -708,95 +1180,223 @@ def _compute_xp(overall_score: float) -> int:
 
 
 # ---------------------------------------------------------------------------
-# GPU function: Demucs vocal isolation
+# GPU workers: Demucs vocal isolation
 # ---------------------------------------------------------------------------
 
 
-@app.function(gpu="A10G", timeout=600)
-def run_demucs_isolation(audio_bytes: bytes, filename: str) -> dict:
-    """Run Demucs on GPU to isolate vocals.
+def _demucs_result(
+    vocal_bytes: bytes,
+    accompaniment_bytes: Optional[bytes],
+    vocals,
+    sr: int,
+    with_features: bool = False,
+) -> dict:
+    """Build the dict returned by the GPU functions from the Demucs stems.
+
+    With *with_features*, features are extracted right here and returned as
+    'features'. They come from *vocals*, the (channels, samples) array at
+    *sr* that Demucs produced, not from decoding the WAV again.
+    """
+    result = {"vocals": vocal_bytes, "accompaniment": accompaniment_bytes}
+    if with_features:
+        import librosa
+        from processing import FEATURE_SR, extract_features_from_array
+
+        y = librosa.resample(vocals.mean(axis=0), orig_sr=sr, target_sr=FEATURE_SR)
+        result["features"] = extract_features_from_array(y, FEATURE_SR)
+    return result
+
+
+class _DemucsModelBase:
+    """Demucs model loaded once per container.
 
-    Returns dict with 'vocals' (bytes) and 'accompaniment' (bytes or None).
+    Subclasses set MODEL_NAME and are registered with @app.cls. Warm
+    containers reuse the loaded checkpoints instead of reloading them from
+    disk on every call (~5-8 s for the htdemucs_ft bag). The checkpoints are
+    loaded on CPU into the container's memory snapshot, so cold starts
+    restore them from the snapshot and only pay the copy to the GPU.
     """
-    from processing import isolate_vocals
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        input_path = os.path.join(tmpdir, filename)
-        with open(input_path, "wb") as f:
-            f.write(audio_bytes)
+    MODEL_NAME = "htdemucs_ft"
 
-        output_dir = os.path.join(tmpdir, "output")
-        os.makedirs(output_dir, exist_ok=True)
+    @modal.enter(snap=True)
+    def load(self):
+        from processing import load_demucs_model
 
-        vocal_path, accompaniment_path = isolate_vocals(input_path, output_dir)
+        self.model = load_demucs_model(self.MODEL_NAME, device="cpu")
 
-        with open(vocal_path, "rb") as f:
-            vocal_bytes = f.read()
+    @modal.enter(snap=False)
+    def to_gpu(self):
+        from processing import demucs_model_to_device
 
-        accompaniment_bytes = None
-        if accompaniment_path and os.path.isfile(accompaniment_path):
-            with open(accompaniment_path, "rb") as f:
-                accompaniment_bytes = f.read()
+        demucs_model_to_device(self.model)
 
-        return {"vocals": vocal_bytes, "accompaniment": accompaniment_bytes}
+    def _isolate_many(
+        self,
+        audio_bytes_list: list[bytes],
+        with_features: list[bool],
+        return_exceptions: bool = False,
+    ) -> list:
+        # Decoded, separated and encoded in memory: no temp-file round trip
+        # for the inputs or the stems. All tracks share one batched pass.
+        # With return_exceptions, a track that fails gets its exception in
+        # place of a result instead of failing the others.
+        from processing import isolate_vocals_bytes_batch
+
+        stems = isolate_vocals_bytes_batch(
+            self.model, audio_bytes_list, return_exceptions=return_exceptions
+        )
+        results = []
+        for stem, feats in zip(stems, with_features):
+            if isinstance(stem, Exception):
+                results.append(stem)
+                continue
+            vocal_bytes, accompaniment_bytes, vocals = stem
+            try:
+                results.append(_demucs_result(
+                    vocal_bytes, accompaniment_bytes, vocals, self.model.samplerate,
+                    feats,
+                ))
+            except Exception as exc:
+                if not return_exceptions:
+                    raise
+                results.append(exc)
+        return results
+
+    def _isolate_one(self, audio_bytes: bytes, with_features: bool = False) -> dict:
+        return self._isolate_many([audio_bytes], [with_features])[0]
+
+
+class _DemucsWorkerBase(_DemucsModelBase):
+    """Demucs separation methods, one call per track or explicit batch."""
+
+    @modal.method()
+    def isolate(
+        self,
+        audio_bytes: bytes,
+        filename: str,
+        with_features: bool = False,
+    ) -> dict:
+        """Isolate vocals from one track.
+
+        Returns dict with 'vocals' (bytes) and 'accompaniment' (bytes or None),
+        plus the extracted vocal 'features' when *with_features* is set (one
+        round trip for callers that need nothing else from the stem).
+        *filename* is only used for logging; the format is detected from the
+        bytes.
+        """
+        logger.info("Demucs isolate: %s (%d bytes)", filename, len(audio_bytes))
+        return self._isolate_one(audio_bytes, with_features)
+
+    @modal.method()
+    def isolate_s3(self, s3_key: str, with_features: bool = False) -> dict:
+        """Like isolate(), but download the input from S3 in the worker.
+
+        Callers pass a key instead of shipping the audio through the Modal
+        argument channel; the GPU container pulls it over S3 directly.
+        """
+        audio_bytes = _download_bytes_from_s3(s3_key)
+        return self._isolate_one(audio_bytes, with_features)
+
+    @modal.method()
+    def isolate_batch(self, audio_bytes_list: list[bytes]) -> list[dict]:
+        """Isolate vocals from several tracks in one invocation.
+
+        For catalog backfills, split the tracks into batches and fan out with
+        ``DemucsWorker().isolate_batch.map(batches)``. The tracks go through
+        the model as one batch. Returns one dict per input, shaped like
+        isolate()'s result.
+        """
+        n = len(audio_bytes_list)
+        return self._isolate_many(audio_bytes_list, [False] * n)
+
+
+@app.cls(
+    image=_gpu_image, gpu="A10G", timeout=1800, scaledown_window=300,
+    enable_memory_snapshot=True,
+)
+class DemucsWorker(_DemucsWorkerBase):
+    """htdemucs_ft (4-model bag) on A10G: references and "pro" recordings."""
+
+    MODEL_NAME = "htdemucs_ft"
 
 
 # ---------------------------------------------------------------------------
-# GPU function: Fast Demucs (htdemucs model for speed)
+# GPU worker: Fast Demucs (htdemucs model for speed)
 # ---------------------------------------------------------------------------
 
 
-@app.function(gpu="T4", timeout=300)
-def run_demucs_fast(audio_bytes: bytes, filename: str) -> dict:
-    """Fast Demucs on T4 GPU using htdemucs model (~2-3x faster than htdemucs_ft)."""
-    from processing import isolate_vocals_fast
+@app.cls(
+    image=_gpu_image, gpu="T4", timeout=300, scaledown_window=300,
+    enable_memory_snapshot=True,
+)
+class DemucsFastWorker(_DemucsWorkerBase):
+    """Single htdemucs model on T4 (~2-3x faster than htdemucs_ft)."""
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        input_path = os.path.join(tmpdir, filename)
-        with open(input_path, "wb") as f:
-            f.write(audio_bytes)
+    MODEL_NAME = "htdemucs"
 
-        output_dir = os.path.join(tmpdir, "output")
-        os.makedirs(output_dir, exist_ok=True)
 
-        vocal_path, accompaniment_path = isolate_vocals_fast(input_path, output_dir)
+# Concurrent user recordings are gathered into one batched model pass:
+# a batch of 4 costs far less GPU time than 4 separate passes. A class with a
+# @modal.batched method can't have other methods, hence its own class.
+_DEMUCS_MAX_BATCH = 4
+_DEMUCS_BATCH_WAIT_MS = 200
 
-        with open(vocal_path, "rb") as f:
-            vocal_bytes = f.read()
 
-        accompaniment_bytes = None
-        if accompaniment_path and os.path.isfile(accompaniment_path):
-            with open(accompaniment_path, "rb") as f:
-                accompaniment_bytes = f.read()
+@app.cls(
+    image=_gpu_image, gpu="T4", timeout=600, scaledown_window=300,
+    enable_memory_snapshot=True,
+)
+class DemucsFastBatchWorker(_DemucsModelBase):
+    """htdemucs on T4, auto-batching concurrent single-recording calls."""
 
-        return {"vocals": vocal_bytes, "accompaniment": accompaniment_bytes}
+    MODEL_NAME = "htdemucs"
 
+    @modal.batched(max_batch_size=_DEMUCS_MAX_BATCH, wait_ms=_DEMUCS_BATCH_WAIT_MS)
+    def isolate_s3(self, s3_keys: list[str], with_features: list[bool]) -> list[dict]:
+        """Batched isolate_s3: callers pass one key (and flag) per call.
 
-# ---------------------------------------------------------------------------
-# CPU function: Feature extraction
-# ---------------------------------------------------------------------------
+        ``DemucsFastBatchWorker().isolate_s3.spawn(key, True)`` returns the
+        same dict as DemucsFastWorker's isolate_s3 for that key. The batch
+        mixes different users' jobs, so a key that fails to download, decode
+        or extract yields {"error": ...} for that call only.
+        """
+        def download(key: str):
+            try:
+                return _download_bytes_from_s3(key)
+            except Exception as exc:
+                return exc
+
+        results = list(_IO_POOL.map(download, s3_keys))
+        fetched = [i for i, r in enumerate(results) if not isinstance(r, Exception)]
+        if fetched:
+            isolated = self._isolate_many(
+                [results[i] for i in fetched],
+                [with_features[i] for i in fetched],
+                return_exceptions=True,
+            )
+            for i, result in zip(fetched, isolated):
+                results[i] = result
 
+        for i, (key, result) in enumerate(zip(s3_keys, results)):
+            if isinstance(result, Exception):
+                logger.error("Demucs batch item %s failed: %s", key, result)
+                results[i] = {"error": f"{type(result).__name__}: {result}"}
+        return results
 
-@app.function(timeout=300)
-def run_feature_extraction(audio_bytes: bytes, filename: str) -> dict:
-    """Extract pitch, onset, and energy features from audio bytes."""
-    return _extract_features_local(audio_bytes, filename)
 
+# ---------------------------------------------------------------------------
+# In-process feature extraction and scoring
+# ---------------------------------------------------------------------------
 
-def _extract_features_local(audio_bytes: bytes, filename: str) -> dict:
-    """Extract features in-process (no container spawn overhead)."""
-    from processing import extract_features
 
-    with tempfile.NamedTemporaryFile(
-        suffix=os.path.splitext(filename)[1], delete=False
-    ) as f:
-        f.write(audio_bytes)
-        tmp_path = f.name
+def _extract_features_pcm16(pcm, sr: int) -> dict:
+    """Extract features in-process from mono int16 PCM (e.g. _decode_audio)."""
+    import numpy as np
+    from processing import extract_features_from_array
 
-    try:
-        return extract_features(tmp_path)
-    finally:
-        os.unlink(tmp_path)
+    y = pcm.astype(np.float32) / 32768.0
+    return extract_features_from_array(y, sr)
 
 
 def _score_and_coach_local(
@@ -814,104 +1414,56 @@ def _score_and_coach_local(
     t0 = time.time()
     if ref_features is not None:
         alignment = align_features(user_features, ref_features)
-        logger.info("[PROFILE] align: %.1fs", time.time() - t0)
+        logger.debug("[PROFILE] align: %.1fs", time.time() - t0)
 
         t1 = time.time()
         scores = score_recording(user_features, ref_features, alignment, scoring_level=scoring_level)
-        logger.info("[PROFILE] score: %.1fs", time.time() - t1)
+        logger.debug("[PROFILE] score: %.1fs", time.time() - t1)
     else:
         logger.info("No reference available, running standalone analysis")
         scores = score_standalone(user_features)
-        logger.info("[PROFILE] standalone_score: %.1fs", time.time() - t0)
+        logger.debug("[PROFILE] standalone_score: %.1fs", time.time() - t0)
 
     # Coaching tips removed from UI — skip Anthropic API call entirely
     coaching_tips: list[str] = []
-    logger.info("[PROFILE] coaching: skipped (tips not displayed)")
+    logger.debug("[PROFILE] coaching: skipped (tips not displayed)")
 
     return {"scores": scores, "coachingTips": coaching_tips}
 
 
 # ---------------------------------------------------------------------------
-# CPU function: Scoring + coaching pipeline (kept for backward compat)
+# Shared I/O thread pool
 # ---------------------------------------------------------------------------
 
+# Endpoints fan out blocking work (Modal .remote() calls, S3 transfers, DB
+# lookups) onto this pool instead of building an executor per request.
+# Threads start lazily on first submit. Sized for max_inputs=10 concurrent
+# jobs. The reference branch waits on a sub-task of its own (the song-level
+# lookup), so the pool must stay larger than max_inputs or those waits could
+# occupy every worker.
+_IO_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="io")
 
-@app.function(timeout=300)
-def run_scoring_and_coaching(
-    user_features: dict,
-    ref_features: dict,
-    voice_part: str,
-    song_title: Optional[str] = None,
-) -> dict:
-    """Align, score, and generate coaching tips. Returns combined results."""
-    import time as _time
-    from processing import align_features
-    from scoring import score_recording
-    from coaching import generate_coaching_tips
-
-    t0 = _time.time()
-    alignment = align_features(user_features, ref_features)
-    logger.info("[PROFILE] align: %.1fs", _time.time() - t0)
-
-    t1 = _time.time()
-    scores = score_recording(user_features, ref_features, alignment)
-    logger.info("[PROFILE] score: %.1fs", _time.time() - t1)
-
-    t1 = _time.time()
-    try:
-        coaching_tips = generate_coaching_tips(
-            scores=scores,
-            problem_areas=scores.get("problemAreas", []),
-            voice_part=voice_part,
-            song_title=song_title,
-        )
-    except Exception as exc:
-        # Fallback: don't let coaching failure kill the whole pipeline
-        logger.error("Coaching tips failed: %s — using defaults", exc)
-        coaching_tips = [
-            "נסה לשמור על יציבות בגובה הצליל לאורך כל הביצוע.",
-            "שים לב לתזמון: הקפד להיכנס יחד עם ההפניה.",
-            "עבוד על דינמיקה: תנודות בעוצמה חשובות להבעה מוזיקלית.",
-        ]
-    logger.info("[PROFILE] coaching: %.1fs", _time.time() - t1)
 
-    return {
-        "scores": scores,
-        "coachingTips": coaching_tips,
-    }
+# ---------------------------------------------------------------------------
+# FastAPI endpoints
+# ---------------------------------------------------------------------------
 
+# Recordings whose mean absolute amplitude (fraction of full scale) is below
+# this are rejected as NO_SIGNAL; an already-spawned Demucs call is cancelled.
+_SILENCE_MEAN_ABS = 1e-4
 
-@app.function(timeout=300)
-def run_standalone_scoring_and_coaching(
-    user_features: dict,
-    voice_part: str,
-    song_title: Optional[str] = None,
-) -> dict:
-    """Score a recording without reference (standalone analysis)."""
-    from scoring import score_standalone
-    from coaching import generate_coaching_tips
 
-    scores = score_standalone(user_features)
-    try:
-        coaching_tips = generate_coaching_tips(
-            scores=scores,
-            problem_areas=scores.get("problemAreas", []),
-            voice_part=voice_part,
-            song_title=song_title,
-        )
-    except Exception as exc:
-        logger.error("Coaching tips failed: %s — using defaults", exc)
-        coaching_tips = [
-            "נסה לשמור על יציבות בגובה הצליל לאורך כל הביצוע.",
-            "שים לב לתזמון: הקפד להיכנס יחד עם ההפניה.",
-            "עבוד על דינמיקה: תנודות בעוצמה חשובות להבעה מוזיקלית.",
-        ]
-    return {"scores": scores, "coachingTips": coaching_tips}
+class NoSignalError(Exception):
+    """The recording contains no audible signal (muted/denied microphone)."""
 
 
-# ---------------------------------------------------------------------------
-# FastAPI endpoints
-# ---------------------------------------------------------------------------
+# Endpoints that do blocking work (S3, Postgres, .remote(), subprocesses) are
+# plain `def` so FastAPI runs them in its threadpool. As `async def` they ran
+# on the event loop and serialised every concurrent request behind each other.
+# The blocking clients they share (boto3, the psycopg pool, _IO_POOL) are all
+# thread-safe and sized for max_inputs, so the loop only ever serves health
+# checks and request parsing; async drivers (aioboto3/asyncpg) would not add
+# concurrency here.
 
 
 @web_app.get("/api/v1/health")
@@ -926,13 +1478,14 @@ async def health():
 
 
 @web_app.post("/api/v1/process-vocal-analysis")
-async def process_vocal_analysis(req: ProcessVocalRequest):
+def process_vocal_analysis(req: ProcessVocalRequest):
     """Main vocal analysis endpoint.
 
     Pipeline:
         1. Update job -> PROCESSING
         2. Download recording from S3
-        3. If NOT headphones: Demucs vocal isolation (GPU)
+        3. If NOT headphones, spawn Demucs vocal isolation (GPU) alongside
+           the download; reject silent recordings (NO_SIGNAL)
         4. Extract features (pitch, onsets, energy)
         5. Load reference features
         6. DTW alignment + scoring
@@ -950,101 +1503,75 @@ async def process_vocal_analysis(req: ProcessVocalRequest):
         req.useHeadphones,
     )
 
+    # No connection is pinned for the job: its few statements run from
+    # different threads, mostly minutes apart, and each borrows from the pool.
+    future_processing: Optional[Future] = None
     try:
         t0 = time.time()
         timings: dict[str, float] = {}
 
-        # Shared DB connection for the pipeline (avoids reconnecting per stage)
-        db = _get_db_conn()
-
-        # 1. Mark job as PROCESSING + set initial stage in one DB call
-        with db.cursor() as cur:
-            cur.execute(
-                """UPDATE "VocalAnalysisJob"
-                   SET status = 'PROCESSING', stage = 'downloading',
-                       "startedAt" = NOW(), attempts = attempts + 1
-                   WHERE id = %s""",
-                (req.jobId,),
-            )
-        db.commit()
-
-        # 2. Download recording from S3
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            recording_path = tmp.name
-        _download_from_s3(req.recordingS3Key, recording_path)
-
-        with open(recording_path, "rb") as f:
-            recording_bytes = f.read()
-        os.unlink(recording_path)
-        timings["download"] = time.time() - t0
-        logger.info("[PROFILE] download: %.1fs (%.1fMB)", timings["download"], len(recording_bytes) / 1e6)
-
-        # 3-5: Isolate/convert + extract features + load reference IN PARALLEL
-        # Reference loading is independent of isolation/extraction, so we run
-        # them concurrently to save time.
-        from concurrent.futures import ThreadPoolExecutor, Future
-
-        def _isolate_and_extract():
-            """Steps 3+4: isolate vocals (or convert) then extract features."""
-            t1 = time.time()
-            if not req.useHeadphones:
-                _update_job_stage(req.jobId, "isolating")
-                logger.info("Running Demucs vocal isolation (no headphones)")
-                demucs_result = run_demucs_isolation.remote(
-                    recording_bytes, "recording.wav"
-                )
-                vb = demucs_result["vocals"]
-            else:
-                _update_job_stage(req.jobId, "converting")
-                logger.info("Headphones used -- skipping vocal isolation, converting to WAV")
-                vb = _convert_to_wav(recording_bytes)
-            timings["isolate"] = time.time() - t1
-            logger.info("[PROFILE] isolate: %.1fs", timings["isolate"])
-
-            # Upload isolated vocal to S3 for frontend playback
-            t2 = time.time()
-            isolated_s3_key = (
-                f"vocal-recordings/{req.userId}/{req.songId}/"
-                f"{req.jobId}_isolated.wav"
-            )
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                tmp.write(vb)
-                tmp_vocal_path = tmp.name
-            try:
-                iso_url = _upload_to_s3(
-                    tmp_vocal_path,
-                    isolated_s3_key,
-                    content_type="audio/wav",
+        # 1. Mark job as PROCESSING + set initial stage in one DB call.
+        # Nothing downstream reads it, so it runs in the background; the
+        # final COMPLETED/FAILED write waits for it to keep the order.
+        def _mark_processing():
+            with _get_db_conn() as conn, conn.cursor() as cur:
+                cur.execute(
+                    """UPDATE "VocalAnalysisJob"
+                       SET status = 'PROCESSING', stage = 'downloading',
+                           "startedAt" = NOW(), attempts = attempts + 1
+                       WHERE id = %s""",
+                    (req.jobId,),
                 )
-            finally:
-                os.unlink(tmp_vocal_path)
-            timings["upload_isolated"] = time.time() - t2
-            logger.info("[PROFILE] upload_isolated: %.1fs", timings["upload_isolated"])
-
-            # Extract features
-            t3 = time.time()
-            _update_job_stage(req.jobId, "extracting")
-            feats = _extract_features_local(vb, "vocal.wav")
-            timings["extract"] = time.time() - t3
-            logger.info("[PROFILE] extract_features: %.1fs", timings["extract"])
 
-            return vb, iso_url, feats
+        future_processing = _IO_POOL.submit(_mark_processing)
+        # Stage writes only apply to PROCESSING rows: each one is chained
+        # behind the PROCESSING write and the stage before it.
+        future_stage: Future = future_processing
 
         def _load_reference():
             """Step 5: load reference features (or auto-create)."""
             t1 = time.time()
+            if req.referenceFeaturesUrl:
+                # Caller supplied the URL: no DB lookup. A stale URL
+                # falls through to the normal resolution below.
+                try:
+                    ref_feats = _load_reference_features(req.referenceFeaturesUrl)
+                    timings["load_ref"] = time.time() - t1
+                    logger.debug("[PROFILE] load_reference: %.3fs (url from request)", timings["load_ref"])
+                    return ref_feats, req.referenceVocalId
+                except Exception as exc:
+                    logger.warning(
+                        "referenceFeaturesUrl %s unusable (%s), resolving reference",
+                        req.referenceFeaturesUrl, exc,
+                    )
+
+            cache_key = (req.referenceVocalId or "", req.songId, req.voicePart)
+            cached = _get_cached_reference(cache_key)
+            if cached is not None:
+                timings["load_ref"] = time.time() - t1
+                logger.debug("[PROFILE] load_reference: %.3fs (cached)", timings["load_ref"])
+                return cached
+
+            def _song_reference():
+                features_url = _find_reference_for_song(req.songId, req.voicePart)
+                return _load_reference_features(features_url) if features_url else None
+
             ref_feats = None
             ref_id = req.referenceVocalId
 
             if ref_id:
+                # Resolve the song/part fallback concurrently; it is only
+                # used if the explicit reference misses.
+                future_song: Future = _IO_POOL.submit(_song_reference)
                 features_url = _get_reference_features_url(ref_id)
                 if features_url:
-                    ref_feats = _download_json_from_s3(features_url)
-
-            if ref_feats is None:
-                features_url = _find_reference_for_song(req.songId, req.voicePart)
-                if features_url:
-                    ref_feats = _download_json_from_s3(features_url)
+                    ref_feats = _load_reference_features(features_url)
+                if ref_feats is None:
+                    ref_feats = future_song.result()
+                else:
+                    future_song.cancel()
+            else:
+                ref_feats = _song_reference()
 
             if ref_feats is None:
                 logger.info(
@@ -1055,22 +1582,126 @@ async def process_vocal_analysis(req: ProcessVocalRequest):
                     ref_feats = ref_result["features"]
                     ref_id = ref_result["referenceVocalId"]
 
+            if ref_feats is not None:
+                _cache_reference(cache_key, ref_feats, ref_id)
+
             timings["load_ref"] = time.time() - t1
-            logger.info("[PROFILE] load_reference: %.1fs (found=%s)", timings["load_ref"], ref_feats is not None)
+            logger.debug("[PROFILE] load_reference: %.1fs (found=%s)", timings["load_ref"], ref_feats is not None)
             return ref_feats, ref_id
 
-        # Run both branches in parallel
-        with ThreadPoolExecutor(max_workers=2) as pool:
-            future_isolate: Future = pool.submit(_isolate_and_extract)
-            future_ref: Future = pool.submit(_load_reference)
+        # Reference resolution and the song title (coaching context) only
+        # depend on the request, so they start before the download and
+        # overlap download, decode and isolation.
+        def _load_reference_and_title():
+            # The title is usually cached already, often by the song
+            # reference lookup's join; it costs a query only otherwise.
+            return _load_reference(), _get_song_title(req.songId)
+
+        future_ref: Future = _IO_POOL.submit(_load_reference_and_title)
+
+        # 3. Demucs reads the recording from S3 itself, so it is spawned
+        # now and its GPU time overlaps the download, decode and silence
+        # gate below as well as the reference lookup.
+        demucs_call = None
+        t_isolate = time.time()
+        if not req.useHeadphones:
+            # The htdemucs_ft bag runs 4 models per pass; only "pro"
+            # thresholds are tight enough to benefit. Other levels use
+            # the single htdemucs checkpoint (~4x less GPU work), batched
+            # with other jobs' recordings on the same worker.
+            if req.scoringLevel == "pro":
+                logger.info("Running Demucs vocal isolation (no headphones, htdemucs_ft)")
+                demucs_call = DemucsWorker().isolate_s3.spawn(
+                    req.recordingS3Key, with_features=True
+                )
+            else:
+                logger.info("Running Demucs vocal isolation (no headphones, htdemucs)")
+                demucs_call = DemucsFastBatchWorker().isolate_s3.spawn(
+                    req.recordingS3Key, True
+                )
 
-            vocal_bytes, isolated_vocal_url, user_features = future_isolate.result()
-            ref_features, reference_vocal_id = future_ref.result()
+        try:
+            # 2. Download recording from S3
+            recording_bytes = _download_bytes_from_s3(req.recordingS3Key)
+            timings["download"] = time.time() - t0
+            logger.debug("[PROFILE] download: %.1fs (%.1fMB)", timings["download"], len(recording_bytes) / 1e6)
+
+            # Silence gate: decode once in-process and fail fast (with
+            # refund). Headphone recordings reuse the PCM.
+            recording_pcm = _decode_audio(recording_bytes, sr=44100)
+            if _is_silent(recording_pcm):
+                raise NoSignalError("NO_SIGNAL: recording contains no audible signal")
+        except Exception:
+            # Don't leave the GPU working on a job that has already failed.
+            if demucs_call is not None:
+                demucs_call.cancel()
+            raise
+
+        # Original recording URL for direct playback (no conversion)
+        _bucket = os.environ["AWS_S3_BUCKET"]
+        _region = os.environ.get("AWS_REGION", "eu-west-1")
+        original_recording_url = f"https://{_bucket}.s3.{_region}.amazonaws.com/{req.recordingS3Key}"
+
+        # 3+4: Isolate + extract features on this thread while the
+        # reference loads in the background.
+        def _isolate_and_extract():
+            """Steps 3+4: isolate vocals, then extract features.
+
+            Demucs jobs get their features from the GPU worker in the same
+            call; headphone recordings are extracted here. Returns the
+            features and the pending upload of the isolated vocal (None
+            for headphone recordings).
+            """
+            nonlocal future_stage
+            if demucs_call is None:
+                # Headphones: the recording already is the vocal. Point
+                # playback at the original instead of uploading a WAV copy.
+                logger.info("Headphones used -- skipping vocal isolation")
+                t3 = time.time()
+                future_stage = _post_job_stage(
+                    req.jobId, "extracting", after=future_stage
+                )
+                feats = _extract_features_pcm16(recording_pcm, 44100)
+                timings["extract"] = time.time() - t3
+                logger.debug("[PROFILE] extract_features: %.1fs", timings["extract"])
+                return feats, None
+
+            # Demucs time counts from the spawn.
+            future_stage = _post_job_stage(req.jobId, "isolating", after=future_stage)
+            demucs_result = demucs_call.get()
+            if "error" in demucs_result:
+                raise RuntimeError(f"Vocal isolation failed: {demucs_result['error']}")
+            timings["isolate"] = time.time() - t_isolate
+            logger.debug("[PROFILE] isolate: %.1fs", timings["isolate"])
+
+            # Upload isolated vocal to S3 for frontend playback. It only
+            # has to finish before the session is saved, so it overlaps
+            # the wait for the reference.
+            isolated_s3_key = (
+                f"vocal-recordings/{req.userId}/{req.songId}/"
+                f"{req.jobId}_isolated.wav"
+            )
+
+            def _upload_isolated() -> str:
+                t2 = time.time()
+                url = _upload_bytes_to_s3(
+                    demucs_result["vocals"], isolated_s3_key, content_type="audio/wav"
+                )
+                timings["upload_isolated"] = time.time() - t2
+                logger.debug("[PROFILE] upload_isolated: %.1fs", timings["upload_isolated"])
+                return url
+
+            return demucs_result["features"], _IO_POOL.submit(_upload_isolated)
+
+        user_features, future_upload = _isolate_and_extract()
+        (ref_features, reference_vocal_id), song_title = future_ref.result()
+        isolated_vocal_url = (
+            future_upload.result() if future_upload is not None else original_recording_url
+        )
 
         # 6 + 7. Score and generate coaching tips (in-process, no .remote())
         t1 = time.time()
-        _update_job_stage(req.jobId, "scoring", conn=db)
-        song_title = _get_song_title(req.songId, conn=db)
+        future_stage = _post_job_stage(req.jobId, "scoring", after=future_stage)
 
         result = _score_and_coach_local(
             user_features, ref_features, req.voicePart, song_title,
@@ -1079,18 +1710,23 @@ async def process_vocal_analysis(req: ProcessVocalRequest):
         scores = result["scores"]
         coaching_tips = result["coachingTips"]
         timings["score_coach"] = time.time() - t1
-        logger.info("[PROFILE] score+coaching: %.1fs", timings["score_coach"])
+        logger.debug("[PROFILE] score+coaching: %.1fs", timings["score_coach"])
 
-        # 8. Compute XP and create VocalPracticeSession
+        # 8. Compute XP and create VocalPracticeSession. No separate
+        # "saving" stage write: the single insert+complete statement below
+        # takes milliseconds, so it would only add a commit round trip.
         t1 = time.time()
-        _update_job_stage(req.jobId, "saving", conn=db)
         xp_earned = _compute_xp(scores["overallScore"])
 
-        # Construct original recording URL for direct playback (no conversion)
-        _bucket = os.environ["AWS_S3_BUCKET"]
-        _region = os.environ.get("AWS_REGION", "eu-west-1")
-        original_recording_url = f"https://{_bucket}.s3.{_region}.amazonaws.com/{req.recordingS3Key}"
+        # XP awarding is handled by the Next.js side when polling detects COMPLETED
 
+        future_processing.result()
+
+        # 9. Insert the session and mark the job COMPLETED in one statement.
+        # Kept inside the request rather than in a BackgroundTask: the
+        # Next.js caller doesn't wait on this response (clients poll the
+        # job row), and a failed save must still reach the FAILED/refund
+        # handler below.
         session_id = _create_vocal_practice_session(
             user_id=req.userId,
             song_id=req.songId,
@@ -1103,24 +1739,10 @@ async def process_vocal_analysis(req: ProcessVocalRequest):
             xp_earned=xp_earned,
             isolated_vocal_url=isolated_vocal_url,
             original_recording_url=original_recording_url,
+            complete_job_id=req.jobId,
         )
         timings["save"] = time.time() - t1
 
-        # XP awarding is handled by the Next.js side when polling detects COMPLETED
-
-        # 9. Update job to COMPLETED (reuse shared connection)
-        now = datetime.now(timezone.utc)
-        with db.cursor() as cur:
-            cur.execute(
-                """UPDATE "VocalAnalysisJob"
-                   SET status = 'COMPLETED', "completedAt" = %s,
-                       "practiceSessionId" = %s
-                   WHERE id = %s""",
-                (now, session_id, req.jobId),
-            )
-        db.commit()
-        db.close()
-
         total_time = time.time() - t0
         logger.info(
             "[PROFILE] Job %s TOTAL: %.1fs | download=%.1f isolate=%.1f upload=%.1f extract=%.1f ref=%.1f score=%.1f save=%.1f | score=%.1f xp=%d",
@@ -1147,26 +1769,31 @@ async def process_vocal_analysis(req: ProcessVocalRequest):
         }
 
     except Exception as exc:
-        error_msg = f"{type(exc).__name__}: {exc}"
-        logger.error("Job %s failed: %s\n%s", req.jobId, error_msg, traceback.format_exc())
-
-        try:
-            if 'db' in locals() and db and not db.closed:
-                db.close()
-        except Exception:
-            pass
-
+        if isinstance(exc, NoSignalError):
+            error_msg = str(exc)
+            status_code = 422
+            logger.warning("Job %s rejected: %s", req.jobId, error_msg)
+        else:
+            error_msg = f"{type(exc).__name__}: {exc}"
+            status_code = 500
+            logger.error("Job %s failed: %s\n%s", req.jobId, error_msg, traceback.format_exc())
+
+        if future_processing is not None:
+            wait([future_processing])
         try:
-            _update_job_status(req.jobId, "FAILED", error_message=error_msg[:500])
-            _refund_quota(req.userId, req.recordingDurationMs)
+            with _get_db_conn() as conn, _db_transaction(conn):
+                _update_job_status(
+                    req.jobId, "FAILED", error_message=error_msg[:500], conn=conn,
+                )
+                _refund_quota(req.userId, req.recordingDurationMs, conn=conn)
         except Exception as inner_exc:
             logger.error("Failed to update job status / refund: %s", inner_exc)
 
-        raise HTTPException(status_code=500, detail=error_msg[:500])
+        raise HTTPException(status_code=status_code, detail=error_msg[:500])
 
 
 @web_app.post("/api/v1/prepare-reference")
-async def prepare_reference(req: PrepareReferenceRequest):
+def prepare_reference(req: PrepareReferenceRequest):
     """Prepare a reference vocal: isolate vocals + extract features.
 
     Pipeline:
@@ -1174,7 +1801,7 @@ async def prepare_reference(req: PrepareReferenceRequest):
         2. Download audio from S3
         3. Run Demucs to isolate vocals (always, GPU)
         4. Extract features
-        5. Upload isolated WAV and features JSON to S3
+        5. Upload isolated WAV and features (.npz) to S3
         6. Update reference -> READY
         On error: update reference -> FAILED
     """
@@ -1189,61 +1816,43 @@ async def prepare_reference(req: PrepareReferenceRequest):
         # 1. Mark as PROCESSING
         _update_reference_status(req.referenceVocalId, "PROCESSING")
 
-        # 2. Download source audio
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            src_path = tmp.name
-        _download_url_from_s3(req.audioFileUrl, src_path)
-
-        with open(src_path, "rb") as f:
-            audio_bytes = f.read()
-        os.unlink(src_path)
-
-        # 3. Demucs vocal isolation (always for references)
-        demucs_result = run_demucs_isolation.remote(audio_bytes, "reference.wav")
+        # 2-4. Demucs vocal isolation (always for references) and feature
+        #      extraction in one GPU call; the worker downloads the source
+        #      audio from S3 itself
+        demucs_result = DemucsWorker().isolate_s3.remote(
+            _s3_key_from_url(req.audioFileUrl), with_features=True
+        )
         vocal_bytes = demucs_result["vocals"]
         accompaniment_bytes = demucs_result.get("accompaniment")
+        features = demucs_result["features"]
 
-        # 4. Extract features from isolated vocals
-        features = run_feature_extraction.remote(vocal_bytes, "reference_vocal.wav")
-
-        # 5. Upload results to S3
+        # 5. Upload results to S3 — isolated and accompaniment WAVs in
+        #    parallel with the features file
         s3_prefix = f"reference-vocals/{req.songId}/{req.voicePart}"
 
-        # Upload isolated WAV
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            tmp.write(vocal_bytes)
-            tmp_vocal_path = tmp.name
-
-        try:
-            isolated_url = _upload_to_s3(
-                tmp_vocal_path,
-                f"{s3_prefix}/{req.referenceVocalId}_isolated.wav",
-                content_type="audio/wav",
-            )
-        finally:
-            os.unlink(tmp_vocal_path)
-
-        # Upload accompaniment WAV (music-only / karaoke track)
-        accompaniment_url = None
+        future_isolated = _IO_POOL.submit(
+            _upload_bytes_to_s3,
+            vocal_bytes,
+            f"{s3_prefix}/{req.referenceVocalId}_isolated.wav",
+            "audio/wav",
+        )
+        # Accompaniment WAV (music-only / karaoke track)
+        future_acc = None
         if accompaniment_bytes:
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                tmp.write(accompaniment_bytes)
-                tmp_acc_path = tmp.name
-            try:
-                accompaniment_url = _upload_to_s3(
-                    tmp_acc_path,
-                    f"{s3_prefix}/{req.referenceVocalId}_accompaniment.wav",
-                    content_type="audio/wav",
-                )
-            finally:
-                os.unlink(tmp_acc_path)
-            logger.info("Uploaded accompaniment: %s", accompaniment_url)
-
-        # Upload features JSON
-        features_url = _upload_json_to_s3(
+            future_acc = _IO_POOL.submit(
+                _upload_bytes_to_s3,
+                accompaniment_bytes,
+                f"{s3_prefix}/{req.referenceVocalId}_accompaniment.wav",
+                "audio/wav",
+            )
+        features_url = _upload_features_to_s3(
             features,
-            f"{s3_prefix}/{req.referenceVocalId}_features.json",
+            f"{s3_prefix}/{req.referenceVocalId}_features.npz",
         )
+        isolated_url = future_isolated.result()
+        accompaniment_url = future_acc.result() if future_acc else None
+        if accompaniment_url:
+            logger.info("Uploaded accompaniment: %s", accompaniment_url)
 
         # Duration in ms
         duration_ms = int(features["duration_s"] * 1000)
@@ -1258,6 +1867,8 @@ async def prepare_reference(req: PrepareReferenceRequest):
             accompaniment_url=accompaniment_url,
         )
 
+        _invalidate_reference(req.songId, req.voicePart, req.referenceVocalId)
+
         logger.info(
             "Reference %s ready: duration=%dms",
             req.referenceVocalId,
@@ -1299,8 +1910,8 @@ async def prepare_reference(req: PrepareReferenceRequest):
 # ---------------------------------------------------------------------------
 
 
-def _run_whisper(audio_path: str, language: str = "he") -> dict:
-    """Transcribe audio using OpenAI Whisper API with word-level timestamps."""
+def _run_whisper(audio_bytes: bytes, language: str = "he", filename: str = "audio.wav") -> dict:
+    """Transcribe in-memory audio using OpenAI Whisper API with word-level timestamps."""
     import openai
 
     api_key = os.environ.get("OPENAI_API_KEY", "")
@@ -1309,14 +1920,13 @@ def _run_whisper(audio_path: str, language: str = "he") -> dict:
         return {"text": "", "words": [], "segments": []}
 
     client = openai.OpenAI(api_key=api_key)
-    with open(audio_path, "rb") as f:
-        result = client.audio.transcriptions.create(
-            file=f,
-            model="whisper-1",
-            response_format="verbose_json",
-            timestamp_granularities=["word", "segment"],
-            language=language if language != "other" else None,
-        )
+    result = client.audio.transcriptions.create(
+        file=(filename, io.BytesIO(audio_bytes)),
+        model="whisper-1",
+        response_format="verbose_json",
+        timestamp_granularities=["word", "segment"],
+        language=language if language != "other" else None,
+    )
     return {
         "text": result.text,
         "words": [{"word": w.word, "start": w.start, "end": w.end} for w in (result.words or [])],
@@ -1330,15 +1940,16 @@ def _run_whisper(audio_path: str, language: str = "he") -> dict:
 
 
 @web_app.post("/api/v1/process-fast")
-async def process_fast(req: ProcessFastRequest):
+def process_fast(req: ProcessFastRequest):
     """All-in-one fast processing: downloads audio, runs Demucs (fast model) and
     Whisper transcription in parallel. Returns audio URLs + stems + timestamps.
 
     Used for initial song setup (KM/practice), not for vocal analysis scoring.
     """
-    import subprocess
     import random
-    from concurrent.futures import ThreadPoolExecutor
+    import subprocess
+    import tempfile
+    import uuid
 
     logger.info(
         "process-fast: youtube_url=%s s3_key=%s song_id=%s lang=%s",
@@ -1356,8 +1967,8 @@ async def process_fast(req: ProcessFastRequest):
             wav_path = os.path.join(tmpdir, "audio.wav")
 
             if req.s3_key:
-                # Download from S3
-                _download_from_s3(req.s3_key, wav_path)
+                # Download from S3 straight into memory
+                audio_bytes = _download_bytes_from_s3(req.s3_key)
                 audio_s3_key = req.s3_key
             else:
                 # Download from YouTube
@@ -1378,6 +1989,7 @@ async def process_fast(req: ProcessFastRequest):
                         "-x",
                         "--audio-format", "wav",
                         "--audio-quality", "0",
+                        "--postprocessor-args", "ExtractAudio:-ar 44100 -ac 2",
                         "--js-runtimes", "node:/usr/local/bin/node",
                         "--remote-components", "ejs:github",
                         "--no-check-certificates",
@@ -1393,83 +2005,74 @@ async def process_fast(req: ProcessFastRequest):
                     error_detail = result.stderr[:300] if result.stderr else "Unknown error"
                     raise HTTPException(status_code=422, detail=f"yt-dlp failed: {error_detail}")
 
-                # Find output file
-                if not os.path.exists(wav_path):
-                    for f in os.listdir(tmpdir):
-                        if f.startswith("audio."):
-                            src = os.path.join(tmpdir, f)
-                            if not f.endswith(".wav"):
-                                subprocess.run(
-                                    ["ffmpeg", "-y", "-i", src, "-ar", "44100", "-ac", "2", wav_path],
-                                    check=True, capture_output=True, timeout=120,
-                                )
-                            else:
-                                wav_path = src
-                            break
-
                 if not os.path.exists(wav_path):
                     raise HTTPException(status_code=500, detail="Failed to extract audio")
 
-                # Upload full audio to S3
+                with open(wav_path, "rb") as f:
+                    audio_bytes = f.read()
+
+                # Upload full audio to S3 while Demucs + Whisper run
                 audio_s3_key = f"youtube-imports/{uuid.uuid4()}.wav"
-                audio_url = _upload_to_s3(wav_path, audio_s3_key, content_type="audio/wav")
+                future_audio_upload = _IO_POOL.submit(
+                    _upload_bytes_to_s3, audio_bytes, audio_s3_key, "audio/wav"
+                )
 
             # Get duration
             import soundfile as sf
-            info = sf.info(wav_path)
+            info = sf.info(io.BytesIO(audio_bytes))
             duration_ms = int(info.duration * 1000)
 
             if req.s3_key:
                 bucket = os.environ["AWS_S3_BUCKET"]
                 region = os.environ.get("AWS_REGION", "eu-west-1")
                 audio_url = f"https://{bucket}.s3.{region}.amazonaws.com/{audio_s3_key}"
+                future_audio_upload = None
 
             logger.info("process-fast: audio ready (%.1fs, %dms)", time.time() - t0, duration_ms)
 
             # ── Phase 2: Demucs + Whisper in parallel ──────────────────
-            with open(wav_path, "rb") as f:
-                audio_bytes = f.read()
-
             demucs_result = {}
             whisper_result = {}
 
             def _run_demucs():
                 nonlocal demucs_result
                 t1 = time.time()
-                demucs_result = run_demucs_fast.remote(audio_bytes, "audio.wav")
+                demucs_result = DemucsFastWorker().isolate.remote(audio_bytes, "audio.wav")
                 logger.info("process-fast: Demucs done (%.1fs)", time.time() - t1)
 
             def _run_whisper_task():
                 nonlocal whisper_result
                 t1 = time.time()
-                whisper_result = _run_whisper(wav_path, req.language)
+                whisper_result = _run_whisper(audio_bytes, req.language)
                 logger.info("process-fast: Whisper done (%.1fs)", time.time() - t1)
 
-            with ThreadPoolExecutor(max_workers=2) as pool:
-                future_demucs = pool.submit(_run_demucs)
-                future_whisper = pool.submit(_run_whisper_task)
-                future_demucs.result()
-                future_whisper.result()
+            future_demucs = _IO_POOL.submit(_run_demucs)
+            future_whisper = _IO_POOL.submit(_run_whisper_task)
+            future_demucs.result()
+            future_whisper.result()
 
-            # ── Phase 3: Upload stems to S3 ────────────────────────────
+            # ── Phase 3: Upload stems to S3 (from memory, in parallel) ─
             base_key = audio_s3_key.rsplit(".", 1)[0]
-            accompaniment_url = None
             accompaniment_s3_key = None
-            vocals_url = None
+            future_acc = future_voc = None
 
             if demucs_result.get("accompaniment"):
-                acc_path = os.path.join(tmpdir, "accompaniment.wav")
-                with open(acc_path, "wb") as f:
-                    f.write(demucs_result["accompaniment"])
                 accompaniment_s3_key = f"{base_key}_accompaniment.wav"
-                accompaniment_url = _upload_to_s3(acc_path, accompaniment_s3_key, "audio/wav")
+                future_acc = _IO_POOL.submit(
+                    _upload_bytes_to_s3,
+                    demucs_result["accompaniment"], accompaniment_s3_key, "audio/wav",
+                )
 
             if demucs_result.get("vocals"):
-                voc_path = os.path.join(tmpdir, "vocals.wav")
-                with open(voc_path, "wb") as f:
-                    f.write(demucs_result["vocals"])
-                vocals_s3_key = f"{base_key}_vocals.wav"
-                vocals_url = _upload_to_s3(voc_path, vocals_s3_key, "audio/wav")
+                future_voc = _IO_POOL.submit(
+                    _upload_bytes_to_s3,
+                    demucs_result["vocals"], f"{base_key}_vocals.wav", "audio/wav",
+                )
+
+            accompaniment_url = future_acc.result() if future_acc else None
+            vocals_url = future_voc.result() if future_voc else None
+            if future_audio_upload is not None:
+                audio_url = future_audio_upload.result()
 
             # Build word timestamps in the format the frontend expects
             word_timestamps = []
@@ -1514,11 +2117,12 @@ async def process_fast(req: ProcessFastRequest):
 
 
 @web_app.post("/api/v1/compress-audio")
-async def compress_audio(req: CompressAudioRequest):
+def compress_audio(req: CompressAudioRequest):
     """Compress an S3 audio file to a smaller format (MP3/OGG).
     Used to get large WAV files under Whisper's 25MB limit.
     Returns a new S3 URL for the compressed file.
     """
+    import tempfile
     import subprocess
 
     logger.info("compress-audio: s3_key=%s format=%s bitrate=%s", req.s3_key, req.target_format, req.bitrate)
@@ -1572,12 +2176,14 @@ async def compress_audio(req: CompressAudioRequest):
 
 
 @web_app.post("/api/v1/youtube-extract")
-async def youtube_extract(req: YouTubeExtractRequest):
+def youtube_extract(req: YouTubeExtractRequest):
     """Download audio from YouTube URL via yt-dlp (routed through residential proxy),
     convert to WAV, upload to S3, return S3 key and duration.
     """
-    import subprocess
     import random
+    import subprocess
+    import tempfile
+    import uuid
 
     logger.info("youtube-extract: url=%s", req.youtube_url)
 
@@ -1610,6 +2216,9 @@ async def youtube_extract(req: YouTubeExtractRequest):
                     "-x",
                     "--audio-format", "wav",
                     "--audio-quality", "0",
+                    # Resample inside the extract step so its single ffmpeg
+                    # pass writes the final 44.1 kHz stereo WAV.
+                    "--postprocessor-args", "ExtractAudio:-ar 44100 -ac 2",
                     "--js-runtimes", "node:/usr/local/bin/node",
                     "--remote-components", "ejs:github",
                     "--no-check-certificates",
@@ -1626,20 +2235,6 @@ async def youtube_extract(req: YouTubeExtractRequest):
                 logger.error("youtube-extract: yt-dlp failed: %s", error_detail)
                 raise HTTPException(status_code=422, detail=f"yt-dlp failed: {error_detail}")
 
-            # Find the output file (yt-dlp may name it differently)
-            if not os.path.exists(wav_path):
-                for f in os.listdir(tmpdir):
-                    if f.startswith("audio."):
-                        src = os.path.join(tmpdir, f)
-                        if not f.endswith(".wav"):
-                            subprocess.run(
-                                ["ffmpeg", "-y", "-i", src, "-ar", "44100", "-ac", "2", wav_path],
-                                check=True, capture_output=True, timeout=120,
-                            )
-                        else:
-                            wav_path = src
-                        break
-
             if not os.path.exists(wav_path):
                 raise HTTPException(status_code=500, detail="Failed to extract audio file")
 
@@ -1674,7 +2269,7 @@ async def youtube_extract(req: YouTubeExtractRequest):
 
 
 @web_app.post("/api/v1/separate-stems")
-async def separate_stems(req: SeparateStemsRequest):
+def separate_stems(req: SeparateStemsRequest):
     """Separate audio into vocals and accompaniment using Demucs.
 
     Downloads from S3, runs Demucs, uploads results back to S3.
@@ -1682,55 +2277,31 @@ async def separate_stems(req: SeparateStemsRequest):
     logger.info("separate-stems: s3_key=%s", req.s3_key)
 
     try:
-        # Download audio from S3
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            src_path = tmp.name
-        _download_from_s3(req.s3_key, src_path)
-
-        with open(src_path, "rb") as f:
-            audio_bytes = f.read()
-        os.unlink(src_path)
-
-        # Run Demucs vocal isolation (GPU)
-        demucs_result = run_demucs_isolation.remote(audio_bytes, "separate.wav")
+        # Run Demucs vocal isolation (GPU worker downloads from S3)
+        demucs_result = DemucsWorker().isolate_s3.remote(req.s3_key)
         vocal_bytes = demucs_result["vocals"]
         accompaniment_bytes = demucs_result.get("accompaniment")
 
         base_key = req.s3_key.rsplit(".", 1)[0]
 
-        # Upload vocals
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            tmp.write(vocal_bytes)
-            tmp_vocal_path = tmp.name
-        try:
-            vocals_key = f"{base_key}_vocals.wav"
-            vocals_url = _upload_to_s3(tmp_vocal_path, vocals_key, content_type="audio/wav")
-        finally:
-            os.unlink(tmp_vocal_path)
+        # Upload both stems in parallel while the duration is probed
+        import soundfile as sf
 
-        # Upload accompaniment
-        accompaniment_url = None
+        vocals_key = f"{base_key}_vocals.wav"
+        future_vocals = _IO_POOL.submit(
+            _upload_bytes_to_s3, vocal_bytes, vocals_key, "audio/wav"
+        )
         accompaniment_key = None
+        future_acc = None
         if accompaniment_bytes:
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                tmp.write(accompaniment_bytes)
-                tmp_acc_path = tmp.name
-            try:
-                accompaniment_key = f"{base_key}_accompaniment.wav"
-                accompaniment_url = _upload_to_s3(tmp_acc_path, accompaniment_key, content_type="audio/wav")
-            finally:
-                os.unlink(tmp_acc_path)
+            accompaniment_key = f"{base_key}_accompaniment.wav"
+            future_acc = _IO_POOL.submit(
+                _upload_bytes_to_s3, accompaniment_bytes, accompaniment_key, "audio/wav"
+            )
 
-        # Get duration
-        import soundfile as sf
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            tmp.write(vocal_bytes)
-            tmp_dur_path = tmp.name
-        try:
-            info = sf.info(tmp_dur_path)
-            duration_ms = int(info.duration * 1000)
-        finally:
-            os.unlink(tmp_dur_path)
+        duration_ms = int(sf.info(io.BytesIO(vocal_bytes)).duration * 1000)
+        vocals_url = future_vocals.result()
+        accompaniment_url = future_acc.result() if future_acc else None
 
         logger.info("separate-stems: done, vocals=%s, accompaniment=%s", vocals_key, accompaniment_key)
 
@@ -1754,7 +2325,7 @@ async def separate_stems(req: SeparateStemsRequest):
 
 
 @web_app.post("/api/v1/crazy-lyrics")
-async def crazy_lyrics(req: CrazyLyricsRequest):
+def crazy_lyrics(req: CrazyLyricsRequest):
     """Generate absurd replacement lyrics matching word counts per line."""
     from crazy_lyrics import generate_crazy_lyrics
 
@@ -1779,4 +2350,10 @@ async def crazy_lyrics(req: CrazyLyricsRequest):
 @modal.asgi_app()
 def fastapi_app():
     """Mount the FastAPI application as a Modal web endpoint."""
+    # Feature extraction and alignment run in-process in this container;
+    # warm them at startup so the first job doesn't pay for it.
+    import processing
+
+    processing.warmup_dtw()
+    processing.warmup_features()
     return web_app
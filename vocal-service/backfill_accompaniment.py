@@ -9,16 +9,26 @@ No GPU needed — runs purely on CPU.
 
 import io
 import os
+import queue
+import struct
 import sys
+import threading
 import time
 import tempfile
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import urllib.parse
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from functools import lru_cache
+from typing import Optional
 
 import numpy as np
-import psycopg2
+from numba import njit, prange
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import boto3
 import soundfile as sf
-import librosa
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 AWS_ACCESS_KEY_ID = os.environ.get("AWS_ACCESS_KEY_ID")
@@ -27,53 +37,129 @@ AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
 AWS_S3_BUCKET = os.environ.get("AWS_S3_BUCKET", "choirmind-audio")
 MAX_WORKERS = 3
 
-
+# Accompaniment URLs are written to the DB in batches by one writer thread:
+# up to URL_BATCH_SIZE rows, or whatever arrived within URL_BATCH_SECONDS of
+# the first one.
+URL_BATCH_SIZE = 50
+URL_BATCH_SECONDS = 2.0
+_url_updates: queue.Queue = queue.Queue()
+
+# Degenerate rows: a vocal that is the original file itself gets no
+# accompaniment (it would be silence), and a silent vocal skips the
+# subtraction, using the original as the accompaniment. Set
+# BACKFILL_SKIP_DEGENERATE=0 to always run the full pipeline.
+SKIP_DEGENERATE = os.environ.get("BACKFILL_SKIP_DEGENERATE", "1") == "1"
+SILENT_VOCAL_PEAK = 1e-4  # about -80 dBFS
+
+# Each worker fetches its original here while downloading the vocal itself.
+_DOWNLOAD_POOL = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="download")
+
+# Accompaniment WAVs are tens of MB: upload them as 8 MB parts, 4 at a time
+# per worker. The client pool covers MAX_WORKERS uploads running at once.
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+    use_threads=True,
+)
+
+
+@lru_cache(maxsize=1)
 def get_s3_client():
+    """Shared S3 client (thread-safe); main() builds it before the workers start."""
     return boto3.client(
         "s3",
         aws_access_key_id=AWS_ACCESS_KEY_ID,
         aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
         region_name=AWS_REGION,
+        config=Config(max_pool_connections=32),
     )
 
 
-def get_ready_without_accompaniment():
-    """Fetch READY references that have isolated vocals but no accompaniment."""
-    conn = psycopg2.connect(DATABASE_URL)
+@lru_cache(maxsize=1)
+def get_pg_pool() -> ThreadedConnectionPool:
+    """Shared connection pool: the pending-refs cursor plus the URL writer."""
+    return ThreadedConnectionPool(1, 2, DATABASE_URL)
+
+
+_PENDING_WHERE = """
+    FROM "ReferenceVocal" rv
+    JOIN "AudioTrack" at ON at.id = rv."sourceTrackId"
+    WHERE rv.status = 'READY'
+      AND rv."isolatedFileUrl" IS NOT NULL
+      AND rv."accompanimentFileUrl" IS NULL
+"""
+
+
+def count_ready_without_accompaniment() -> int:
+    """Number of READY references that still need an accompaniment."""
+    pool = get_pg_pool()
+    conn = pool.getconn()
     try:
         with conn.cursor() as cur:
+            cur.execute("SELECT count(*)" + _PENDING_WHERE)
+            return cur.fetchone()[0]
+    finally:
+        conn.rollback()
+        pool.putconn(conn)
+
+
+def iter_ready_without_accompaniment():
+    """Yield READY references that have isolated vocals but no accompaniment.
+
+    Rows come from a server-side cursor in batches, so the pending list is
+    never held in memory; the connection stays checked out until the
+    generator is exhausted or closed.
+    """
+    pool = get_pg_pool()
+    conn = pool.getconn()
+    try:
+        with conn.cursor(name="pending_accompaniment") as cur:
+            cur.itersize = 100
             cur.execute("""
                 SELECT rv.id, rv."songId", rv."voicePart", rv."isolatedFileUrl",
                        at."fileUrl" AS "originalUrl"
-                FROM "ReferenceVocal" rv
-                JOIN "AudioTrack" at ON at.id = rv."sourceTrackId"
-                WHERE rv.status = 'READY'
-                  AND rv."isolatedFileUrl" IS NOT NULL
-                  AND rv."accompanimentFileUrl" IS NULL
+            """ + _PENDING_WHERE + """
                 ORDER BY rv."createdAt" ASC
             """)
-            rows = cur.fetchall()
-            return [
-                {
+            for r in cur:
+                yield {
                     "id": r[0],
                     "songId": r[1],
                     "voicePart": r[2],
                     "isolatedFileUrl": r[3],
                     "originalUrl": r[4],
                 }
-                for r in rows
-            ]
     finally:
-        conn.close()
+        conn.rollback()
+        pool.putconn(conn)
 
 
-def download_audio(url: str) -> tuple[np.ndarray, int]:
-    """Download audio from URL and return (samples, sample_rate)."""
-    import urllib.request
+def fetch_bytes(url: str) -> bytes:
+    """Fetch a URL; objects in our bucket go through the shared S3 client."""
+    prefix = f"https://{AWS_S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/"
+    if url.startswith(prefix):
+        key = urllib.parse.unquote(url[len(prefix):])
+        return get_s3_client().get_object(Bucket=AWS_S3_BUCKET, Key=key)["Body"].read()
     with urllib.request.urlopen(url, timeout=120) as resp:
-        data = resp.read()
+        return resp.read()
+
+
+def decode_audio(data: bytes, url: str) -> tuple[np.ndarray, int]:
+    """Decode downloaded audio to ((channels, samples) float32, sample_rate).
 
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+    Decoded straight from memory with soundfile (no resampling is needed);
+    only formats libsndfile can't read go through a temp file and librosa.
+    """
+    try:
+        audio, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+        return audio.T, sr
+    except RuntimeError:  # soundfile.LibsndfileError
+        pass
+
+    import librosa
+
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(url.split("?")[0])[1], delete=False) as f:
         f.write(data)
         tmp_path = f.name
 
@@ -84,79 +170,218 @@ def download_audio(url: str) -> tuple[np.ndarray, int]:
         os.unlink(tmp_path)
 
 
-def process_one(idx: int, total: int, ref: dict) -> bool:
-    """Create accompaniment for one reference vocal."""
+# torchaudio Resample modules per (orig_sr, target_sr). Building one computes
+# the polyphase filter kernel, so workers share them; forward() is stateless.
+_RESAMPLERS: dict[tuple[int, int], object] = {}
+_RESAMPLERS_LOCK = threading.Lock()
+
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """Resample (channels, samples) float32 audio with a cached torchaudio kernel."""
+    import torch
+    import torchaudio
+
+    with _RESAMPLERS_LOCK:
+        resampler = _RESAMPLERS.get((orig_sr, target_sr))
+        if resampler is None:
+            resampler = _RESAMPLERS[(orig_sr, target_sr)] = torchaudio.transforms.Resample(
+                orig_sr, target_sr
+            )
+    with torch.no_grad():
+        out = resampler(torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32)))
+    return out.numpy()
+
+
+def subtract_int16(original_data: bytes, vocal_data: bytes) -> Optional[tuple[np.ndarray, int]]:
+    """Accompaniment computed on 16-bit samples, if no resampling is needed.
+
+    Applies when libsndfile can read both files and their sample rates
+    match (always the case for a WAV original vs. its Demucs stem, and for
+    MP3 originals at 44.1 kHz). Both are decoded straight to int16, half the
+    bytes of float32, since the output is 16-bit PCM anyway. Returns
+    ((samples, channels) int16, sample_rate), or None to use the float path.
+    The difference is taken in int32 so it can't wrap, and scaled down only
+    if it exceeds int16 range, mirroring the float path's peak normalisation.
+    Output matches subtract_float + encode_wav_pcm16 exactly when no scaling
+    is needed, and within 2 LSB when it is (the two paths scale and round
+    differently).
+    """
+    try:
+        info_o = sf.info(io.BytesIO(original_data))
+        info_v = sf.info(io.BytesIO(vocal_data))
+    except RuntimeError:  # soundfile.LibsndfileError
+        return None
+    if info_o.samplerate != info_v.samplerate:
+        return None
+
+    original, sr = sf.read(io.BytesIO(original_data), dtype="int16", always_2d=True)
+    vocal, _ = sf.read(io.BytesIO(vocal_data), dtype="int16", always_2d=True)
+    n = min(len(original), len(vocal))
+    if SKIP_DEGENERATE and n and (
+        max(-int(vocal[:n].min()), int(vocal[:n].max())) < SILENT_VOCAL_PEAK * 32768
+    ):
+        return original, sr
+    channels = vocal.shape[1] if original.shape[1] == 1 else original.shape[1]
+    accompaniment = np.empty((n, channels), dtype=np.int32)
+    peak = _subtract_peak(original[:n], vocal[:n], accompaniment)
+    if peak > 32767:
+        return (accompaniment * (32767.0 / peak)).astype(np.int16), sr
+    return accompaniment.astype(np.int16), sr
+
+
+def subtract_float(
+    original: np.ndarray, sr_orig: int, vocal: np.ndarray, sr_vocal: int
+) -> np.ndarray:
+    """Accompaniment from decoded (channels, samples) float audio.
+
+    Resamples and up/down-mixes the vocal to match the original. Returns
+    (samples, channels) float32, as soundfile expects.
+    """
+    if SKIP_DEGENERATE and vocal.size and (
+        max(-float(vocal.min()), float(vocal.max())) < SILENT_VOCAL_PEAK
+    ):
+        return np.atleast_2d(original).T
+
+    # Ensure same sample rate
+    if sr_vocal != sr_orig:
+        vocal = resample(vocal, sr_vocal, sr_orig)
+
+    # Ensure same shape (mono vs stereo)
+    if original.ndim == 1:
+        original = original.reshape(1, -1)
+    if vocal.ndim == 1:
+        vocal = vocal.reshape(1, -1)
+
+    # Match length and switch to (samples, channels): for soundfile-decoded
+    # input that is the buffer's native C-contiguous layout, and it is what
+    # the WAV writer wants back. Both are views; the kernel reads any strides.
+    min_len = min(original.shape[1], vocal.shape[1])
+    original = original[:, :min_len].T
+    vocal = vocal[:, :min_len].T
+
+    # A mono original is upmixed to the vocal's channels, which needs a new
+    # output buffer; otherwise the result overwrites the original (ours).
+    if original.shape[1] == 1 and vocal.shape[1] > 1:
+        out = np.empty(vocal.shape, dtype=np.float32)
+    else:
+        out = original
+
+    # Normalize to prevent clipping
+    peak = _subtract_peak(original, vocal, out)
+    if peak > 1.0:
+        out *= np.float32(1.0 / peak)
+    return out
+
+
+_KERNEL_CHUNK = 1 << 16
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _subtract_peak(original, vocal, out):
+    """out = original - vocal in one pass; returns the peak |out|.
+
+    All arrays are (samples, channels): float32 throughout, or int16 inputs
+    with an int32 out so the difference can't wrap. A mono original is
+    upmixed and a vocal with a different channel count is downmixed to its
+    mean on the fly, so no matched copies are built. out may be original
+    itself. Chunks of samples run in parallel, each keeping its own peak.
+    """
+    n, channels = out.shape
+    c_orig = original.shape[1]
+    c_voc = vocal.shape[1]
+    n_chunks = (n + _KERNEL_CHUNK - 1) // _KERNEL_CHUNK
+    peaks = np.zeros(max(n_chunks, 1), dtype=np.float32)
+    for k in prange(n_chunks):
+        peak = np.float32(0.0)
+        for i in range(k * _KERNEL_CHUNK, min(n, (k + 1) * _KERNEL_CHUNK)):
+            v_mix = np.float32(0.0)
+            if c_voc != channels:
+                for c in range(c_voc):
+                    v_mix += vocal[i, c]
+                v_mix /= c_voc
+            for c in range(channels):
+                o = original[i, c] if c_orig == channels else original[i, 0]
+                v = vocal[i, c] if c_voc == channels else v_mix
+                d = o - v
+                out[i, c] = d
+                if abs(d) > peak:
+                    peak = abs(d)
+        peaks[k] = peak
+    return peaks.max()
+
+
+def encode_wav_pcm16(audio: np.ndarray, sr: int) -> io.BytesIO:
+    """16-bit PCM WAV of (samples, channels) audio, built in a single buffer.
+
+    The BytesIO is sized up front to header + data and the samples are
+    converted straight into it. Float input is quantised the way
+    soundfile's PCM_16 writer does it (floor(x * 32768), clipped) and is
+    used as scratch space.
+    """
+    n, channels = audio.shape
+    data_size = n * channels * 2
+
+    buf = io.BytesIO()
+    buf.seek(44 + data_size - 1)
+    buf.write(b"\0")
+    with buf.getbuffer() as view:
+        struct.pack_into(
+            "<4sI4s4sIHHIIHH4sI", view, 0,
+            b"RIFF", 36 + data_size, b"WAVE",
+            b"fmt ", 16, 1, channels, sr, sr * channels * 2, channels * 2, 16,
+            b"data", data_size,
+        )
+        pcm = np.frombuffer(view, dtype="<i2", offset=44).reshape(n, channels)
+        if audio.dtype != np.int16:
+            audio *= np.float32(32768)
+            np.floor(audio, out=audio)
+            np.clip(audio, -32768, 32767, out=audio)
+        np.copyto(pcm, audio, casting="unsafe")
+        del pcm
+    buf.seek(0)
+    return buf
+
+
+def process_one(idx: int, total: int, ref: dict) -> Optional[bool]:
+    """Create accompaniment for one reference vocal (None if skipped)."""
     label = f"[{idx+1}/{total}] {ref['voicePart']} song={ref['songId'][:8]}"
+    if SKIP_DEGENERATE and ref["isolatedFileUrl"] == ref["originalUrl"]:
+        print(f"  SKIP {label} -> vocal URL is the original", flush=True)
+        return None
     try:
-        # Download original and vocal
-        original, sr_orig = download_audio(ref["originalUrl"])
-        vocal, sr_vocal = download_audio(ref["isolatedFileUrl"])
-
-        # Ensure same sample rate
-        if sr_vocal != sr_orig:
-            vocal = librosa.resample(vocal, orig_sr=sr_vocal, target_sr=sr_orig)
-            sr_vocal = sr_orig
-
-        # Ensure same shape (mono vs stereo)
-        if original.ndim == 1:
-            original = original.reshape(1, -1)
-        if vocal.ndim == 1:
-            vocal = vocal.reshape(1, -1)
-
-        # Match channels
-        if original.shape[0] != vocal.shape[0]:
-            if original.shape[0] == 1:
-                original = np.repeat(original, vocal.shape[0], axis=0)
-            else:
-                vocal = np.mean(vocal, axis=0, keepdims=True)
-                vocal = np.repeat(vocal, original.shape[0], axis=0)
-
-        # Match length
-        min_len = min(original.shape[1], vocal.shape[1])
-        original = original[:, :min_len]
-        vocal = vocal[:, :min_len]
-
-        # Subtract
-        accompaniment = original - vocal
-
-        # Normalize to prevent clipping
-        peak = np.max(np.abs(accompaniment))
-        if peak > 1.0:
-            accompaniment = accompaniment / peak
-
-        # Convert to mono if single channel
-        if accompaniment.shape[0] == 1:
-            accompaniment = accompaniment[0]
+        # Download original and vocal concurrently
+        original_future = _DOWNLOAD_POOL.submit(fetch_bytes, ref["originalUrl"])
+        vocal_data = fetch_bytes(ref["isolatedFileUrl"])
+        original_data = original_future.result()
+        if SKIP_DEGENERATE and original_data == vocal_data:
+            print(f"  SKIP {label} -> vocal file is identical to the original", flush=True)
+            return None
+
+        result = subtract_int16(original_data, vocal_data)
+        if result is not None:
+            accompaniment, sr_orig = result
         else:
-            accompaniment = accompaniment.T  # soundfile expects (samples, channels)
+            original, sr_orig = decode_audio(original_data, ref["originalUrl"])
+            vocal, sr_vocal = decode_audio(vocal_data, ref["isolatedFileUrl"])
+            del original_data, vocal_data
+            accompaniment = subtract_float(original, sr_orig, vocal, sr_vocal)
 
         # Write to buffer
-        buf = io.BytesIO()
-        sf.write(buf, accompaniment, sr_orig, format="WAV")
-        buf.seek(0)
+        buf = encode_wav_pcm16(accompaniment, sr_orig)
 
         # Upload to S3
         s3_key = f"reference-vocals/{ref['songId']}/{ref['voicePart']}/{ref['id']}_accompaniment.wav"
-        s3 = get_s3_client()
-        s3.upload_fileobj(
+        get_s3_client().upload_fileobj(
             buf,
             AWS_S3_BUCKET,
             s3_key,
             ExtraArgs={"ContentType": "audio/wav"},
+            Config=S3_TRANSFER_CONFIG,
         )
         s3_url = f"https://{AWS_S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{s3_key}"
 
-        # Update DB
-        conn = psycopg2.connect(DATABASE_URL)
-        try:
-            with conn.cursor() as cur:
-                cur.execute(
-                    'UPDATE "ReferenceVocal" SET "accompanimentFileUrl" = %s WHERE id = %s',
-                    (s3_url, ref["id"]),
-                )
-            conn.commit()
-        finally:
-            conn.close()
+        # Queue the DB update for the batch writer
+        _url_updates.put((ref["id"], s3_url))
 
         print(f"  OK   {label}", flush=True)
         return True
@@ -165,6 +390,53 @@ def process_one(idx: int, total: int, ref: dict) -> bool:
         return False
 
 
+def write_accompaniment_urls():
+    """Writer thread: drain _url_updates into batched UPDATEs until None.
+
+    Uses one pooled connection for the whole run and commits per batch.
+    Returns the number of rows whose batch failed to commit.
+    """
+    pool = get_pg_pool()
+    conn = pool.getconn()
+    lost = 0
+    done = False
+    try:
+        while not done:
+            item = _url_updates.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + URL_BATCH_SECONDS
+            while len(batch) < URL_BATCH_SIZE:
+                try:
+                    item = _url_updates.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+
+            try:
+                with conn.cursor() as cur:
+                    execute_values(
+                        cur,
+                        'UPDATE "ReferenceVocal" SET "accompanimentFileUrl" = data.url '
+                        'FROM (VALUES %s) AS data (id, url) '
+                        'WHERE "ReferenceVocal".id = data.id',
+                        batch,
+                        page_size=URL_BATCH_SIZE,
+                    )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                lost += len(batch)
+                print(f"  FAIL DB update of {len(batch)} URLs -> {e}", flush=True)
+    finally:
+        pool.putconn(conn)
+    return lost
+
+
 def main():
     if not DATABASE_URL:
         print("ERROR: DATABASE_URL not set")
@@ -173,8 +445,8 @@ def main():
         print("ERROR: AWS credentials not set")
         sys.exit(1)
 
-    refs = get_ready_without_accompaniment()
-    total = len(refs)
+    get_s3_client()
+    total = count_ready_without_accompaniment()
     print(f"Found {total} READY references without accompaniment")
     print(f"Using {MAX_WORKERS} concurrent workers")
 
@@ -184,23 +456,44 @@ def main():
 
     success = 0
     failed = 0
+    skipped = 0
     start = time.time()
 
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = {
-            executor.submit(process_one, i, total, ref): ref
-            for i, ref in enumerate(refs)
-        }
-        for future in as_completed(futures):
-            if future.result():
+    def tally(done):
+        nonlocal success, failed, skipped
+        for future in done:
+            result = future.result()
+            if result is None:
+                skipped += 1
+            elif result:
                 success += 1
             else:
                 failed += 1
 
+    # Keep at most 2 * MAX_WORKERS jobs queued, pulling the next reference
+    # from the cursor as each one finishes.
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS + 1) as executor:
+        writer = executor.submit(write_accompaniment_urls)
+        try:
+            for i, ref in enumerate(iter_ready_without_accompaniment()):
+                if len(in_flight) >= 2 * MAX_WORKERS:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    tally(done)
+                in_flight.add(executor.submit(process_one, i, total, ref))
+            tally(as_completed(in_flight))
+        finally:
+            _url_updates.put(None)
+        lost = writer.result()
+    success -= lost
+    failed += lost
+
+    get_pg_pool().closeall()
+
     elapsed = time.time() - start
     print(f"\n{'='*60}")
     print(f"ACCOMPANIMENT BACKFILL COMPLETE in {elapsed:.0f}s")
-    print(f"  {success} succeeded, {failed} failed out of {total}")
+    print(f"  {success} succeeded, {failed} failed, {skipped} skipped out of {total}")
     print(f"{'='*60}")
 
 
@@ -1,21 +1,21 @@
 """
 Backfill script: fires prepare-reference requests for all PENDING ReferenceVocals.
-Uses threading for parallel processing (5 concurrent requests).
+Uses asyncio + httpx for parallel processing (MAX_CONCURRENT requests in flight).
 """
 
-import json
+import asyncio
 import os
 import sys
 import time
-import urllib.request
-import urllib.error
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import httpx
+import orjson
 import psycopg2
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 SERVICE_URL = "https://kivimedia--choirmind-vocal-service-fastapi-app.modal.run"
-MAX_WORKERS = 4
+MAX_CONCURRENT = 32
+MAX_ATTEMPTS = 3
 
 
 def get_pending_references():
@@ -45,29 +45,60 @@ def get_pending_references():
         conn.close()
 
 
-def fire_request(idx, total, ref):
-    """Send a prepare-reference request to the Modal service."""
+async def fire_request(sem, client, idx, total, ref):
+    """Send a prepare-reference request to the Modal service.
+
+    Transport errors (other than read timeouts) and 5xx responses are
+    retried with exponential backoff (2s, 4s, ...); 4xx responses fail
+    immediately.
+    """
     label = f"[{idx+1}/{total}] {ref['voicePart']} song={ref['songId'][:8]}"
     url = f"{SERVICE_URL}/api/v1/prepare-reference"
-    data = json.dumps(ref).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=600) as resp:
-            result = json.loads(resp.read().decode("utf-8"))
-            print(f"  OK  {label} -> {result.get('durationMs')}ms", flush=True)
-            return True
-    except urllib.error.HTTPError as e:
-        body = e.read().decode("utf-8", errors="replace")[:200]
-        print(f"  FAIL {label} -> HTTP {e.code}: {body}", flush=True)
-        return False
-    except Exception as e:
-        print(f"  FAIL {label} -> {e}", flush=True)
-        return False
+    async with sem:
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                resp = await client.post(
+                    url,
+                    content=orjson.dumps(ref),
+                    headers={"Content-Type": "application/json"},
+                )
+                if resp.status_code < 500 or attempt == MAX_ATTEMPTS:
+                    resp.raise_for_status()
+                    result = orjson.loads(resp.content)
+                    print(f"  OK  {label} -> {result.get('durationMs')}ms", flush=True)
+                    return True
+                reason = f"HTTP {resp.status_code}"
+            except httpx.HTTPStatusError as e:
+                body = e.response.text[:200]
+                print(f"  FAIL {label} -> HTTP {e.response.status_code}: {body}", flush=True)
+                return False
+            except httpx.TransportError as e:
+                # A read timeout means the job may still be running; don't
+                # start it a second time.
+                if attempt == MAX_ATTEMPTS or isinstance(e, httpx.ReadTimeout):
+                    print(f"  FAIL {label} -> {e!r}", flush=True)
+                    return False
+                reason = repr(e)
+            except Exception as e:
+                print(f"  FAIL {label} -> {e}", flush=True)
+                return False
+            delay = 2 ** attempt
+            print(f"  RETRY {label} -> {reason}, again in {delay}s", flush=True)
+            await asyncio.sleep(delay)
+    return False
+
+
+async def run(refs):
+    """Fire every request, MAX_CONCURRENT at a time; returns per-ref results."""
+    total = len(refs)
+    sem = asyncio.Semaphore(MAX_CONCURRENT)
+    async with httpx.AsyncClient(
+        timeout=600,
+        limits=httpx.Limits(max_connections=MAX_CONCURRENT * 2),
+    ) as client:
+        return await asyncio.gather(
+            *(fire_request(sem, client, i, total, ref) for i, ref in enumerate(refs))
+        )
 
 
 def main():
@@ -78,26 +109,16 @@ def main():
     refs = get_pending_references()
     total = len(refs)
     print(f"Found {total} PENDING reference vocals to process")
-    print(f"Using {MAX_WORKERS} concurrent workers")
+    print(f"Using {MAX_CONCURRENT} concurrent requests")
 
     if total == 0:
         print("Nothing to do!")
         return
 
-    success = 0
-    failed = 0
     start = time.time()
-
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = {
-            executor.submit(fire_request, i, total, ref): ref
-            for i, ref in enumerate(refs)
-        }
-        for future in as_completed(futures):
-            if future.result():
-                success += 1
-            else:
-                failed += 1
+    results = asyncio.run(run(refs))
+    success = sum(results)
+    failed = total - success
 
     elapsed = time.time() - start
     print(f"\n{'='*60}")
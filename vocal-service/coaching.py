@@ -5,14 +5,30 @@ Analyses scoring results and problem areas to produce 3-5 specific,
 actionable coaching tips in Hebrew for choir members.
 """
 
-import json
 import logging
+import re
+from functools import lru_cache
 from typing import Optional
 
 import anthropic
+import orjson
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=1)
+def _client() -> anthropic.Anthropic:
+    """Process-wide Anthropic client (reads ANTHROPIC_API_KEY from env).
+
+    The client is thread-safe; reusing it keeps connections to the API alive
+    between requests in a warm container.
+    """
+    return anthropic.Anthropic()
+
+
+# Matches ```json ... ``` or ``` ... ```
+_FENCE_RE = re.compile(r'```(?:json)?\s*\n?(.*?)```', re.DOTALL)
+
 SYSTEM_PROMPT = (
     "You are a vocal coach for an Israeli choir app called Choirmind. "
     "Give 3-5 specific, actionable coaching tips in Hebrew. "
@@ -44,10 +60,8 @@ def generate_coaching_tips(
 
     logger.info("Requesting coaching tips from Claude Haiku")
 
-    client = anthropic.Anthropic()  # reads ANTHROPIC_API_KEY from env
-
     try:
-        response = client.messages.create(
+        response = _client().messages.create(
             model="claude-haiku-4-5-20251001",
             max_tokens=1024,
             system=SYSTEM_PROMPT,
@@ -65,12 +79,12 @@ def generate_coaching_tips(
 
     # Parse the JSON array
     try:
-        tips = json.loads(raw_text)
+        tips = orjson.loads(raw_text)
         if not isinstance(tips, list):
             raise ValueError("Expected JSON array")
         # Ensure we have strings and cap at 5
         tips = [str(t) for t in tips[:5]]
-    except (json.JSONDecodeError, ValueError) as exc:
+    except ValueError as exc:  # includes orjson.JSONDecodeError
         logger.warning(
             "Failed to parse Claude response as JSON array: %s. Raw: %s",
             exc,
@@ -89,9 +103,7 @@ def generate_coaching_tips(
 
 def _strip_markdown_fences(text: str) -> str:
     """Remove markdown code fences that Claude sometimes adds."""
-    import re
-    # Match ```json ... ``` or ``` ... ```
-    m = re.search(r'```(?:json)?\s*\n?(.*?)```', text, re.DOTALL)
+    m = _FENCE_RE.search(text)
     if m:
         return m.group(1).strip()
     # Also handle case where only opening fence exists
@@ -3,33 +3,88 @@ Crazy Lyrics Generator — uses Claude Haiku to generate absurd alternative lyri
 that match the syllable structure of the original.
 """
 
-import json
 import logging
 import re
+from functools import lru_cache
 
 import anthropic
+import numpy as np
+import orjson
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _client() -> anthropic.Anthropic:
+    """Shared Anthropic client, built on first use (see coaching._client)."""
+    return anthropic.Anthropic()
+
+
+# Nikkud / cantillation marks, stripped before counting.
+_NIKKUD_RE = re.compile(r'[\u0591-\u05C7]')
+_VOWEL_GROUP_RE = re.compile(r'[aeiouAEIOU]+')
+# Outermost JSON array in the model's reply.
+_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+
 def _count_hebrew_syllables(word: str) -> int:
     """Rough Hebrew syllable count based on vowel letters (א, ה, ו, י, ע).
 
     Hebrew syllable counting is complex. This is a simple heuristic:
     count vowel-bearing consonant clusters. For non-Hebrew, count vowels.
     """
-    # Strip nikkud (diacritics)
-    cleaned = re.sub(r'[\u0591-\u05C7]', '', word)
+    return _count_line_syllables([word])[0]
 
-    # Check if the word is Hebrew
-    if any('\u0590' <= c <= '\u05FF' for c in cleaned):
-        # Hebrew: roughly 1 syllable per consonant (min 1)
-        consonants = sum(1 for c in cleaned if '\u05D0' <= c <= '\u05EA')
-        return max(1, consonants)
-    else:
-        # Non-Hebrew: count vowel groups
-        vowels = len(re.findall(r'[aeiouAEIOU]+', cleaned))
-        return max(1, vowels)
+
+def _count_line_syllables(words: list[str]) -> list[int]:
+    """Syllable counts for every word of a line (see _count_hebrew_syllables).
+
+    The Hebrew checks run as numpy masks over the line's code points, with
+    one reduceat per mask giving the per-word totals; only non-Hebrew words
+    fall back to the vowel-group regex.
+    """
+    counts = [1] * len(words)
+    idx = [i for i, w in enumerate(words) if w]
+    if not idx:
+        return counts
+
+    cps = np.frombuffer(
+        "".join(words[i] for i in idx).encode("utf-32-le"), dtype=np.uint32
+    )
+    bounds = np.zeros(len(idx), dtype=np.intp)
+    np.cumsum([len(words[i]) for i in idx[:-1]], out=bounds[1:])
+
+    is_nikkud = (cps >= 0x0591) & (cps <= 0x05C7)
+    is_hebrew = (cps >= 0x0590) & (cps <= 0x05FF) & ~is_nikkud
+    is_consonant = (cps >= 0x05D0) & (cps <= 0x05EA)
+    hebrew = np.add.reduceat(is_hebrew, bounds)
+    consonants = np.add.reduceat(is_consonant, bounds)
+
+    for k, i in enumerate(idx):
+        if hebrew[k]:
+            # Hebrew: roughly 1 syllable per consonant (min 1)
+            n = int(consonants[k])
+        else:
+            # Non-Hebrew: count vowel groups
+            n = len(_VOWEL_GROUP_RE.findall(_NIKKUD_RE.sub("", words[i])))
+        counts[i] = max(1, n)
+    return counts
+
+
+@lru_cache(maxsize=1024)
+def _line_spec(words: tuple[str, ...]) -> str:
+    """Prompt description of one original line (word and syllable counts).
+
+    Cached: songs repeat their choruses, and the same lyrics come back
+    whenever a user asks for another version.
+    """
+    if not words:
+        return "(empty)"
+    return (
+        f"{len(words)} words, "
+        f"syllables per word: {_count_line_syllables(list(words))}, "
+        f"original: {' '.join(words)}"
+    )
 
 
 def generate_crazy_lyrics(
@@ -57,18 +112,10 @@ def generate_crazy_lyrics(
     }.get(language, "Hebrew (עברית)")
 
     # Build line descriptions
-    line_specs = []
-    for i, line in enumerate(original_lines):
-        if not line:
-            line_specs.append(f"Line {i + 1}: (empty)")
-            continue
-        word_count = len(line)
-        syllable_counts = [_count_hebrew_syllables(w) for w in line]
-        line_specs.append(
-            f"Line {i + 1}: {word_count} words, "
-            f"syllables per word: {syllable_counts}, "
-            f"original: {' '.join(line)}"
-        )
+    line_specs = [
+        f"Line {i + 1}: {_line_spec(tuple(line))}"
+        for i, line in enumerate(original_lines)
+    ]
 
     prompt = f"""Generate funny, absurd, grammatically-correct {lang_name} replacement lyrics.
 
@@ -89,8 +136,7 @@ Example: [["word1", "word2"], ["word3", "word4", "word5"]]
 IMPORTANT: The number of words in each line MUST match exactly. Empty lines should be empty arrays []."""
 
     try:
-        client = anthropic.Anthropic()
-        response = client.messages.create(
+        response = _client().messages.create(
             model="claude-haiku-4-5-20251001",
             max_tokens=2000,
             messages=[{"role": "user", "content": prompt}],
@@ -99,11 +145,11 @@ IMPORTANT: The number of words in each line MUST match exactly. Empty lines shou
         # Extract JSON from response
         text = response.content[0].text.strip()
         # Try to find JSON array in the response
-        match = re.search(r'\[.*\]', text, re.DOTALL)
+        match = _ARRAY_RE.search(text)
         if match:
-            result = json.loads(match.group())
+            result = orjson.loads(match.group())
         else:
-            result = json.loads(text)
+            result = orjson.loads(text)
 
         # Validate structure
         if not isinstance(result, list):
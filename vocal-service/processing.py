@@ -7,146 +7,273 @@ Handles:
 - DTW alignment between user recording and reference
 """
 
+import hashlib
+import io
 import json
 import logging
+import math
 import os
 import tempfile
-from pathlib import Path
 from typing import Optional
 
 import librosa
 import numpy as np
 import parselmouth
-from fastdtw import fastdtw
-from scipy.spatial.distance import euclidean
+from numba import njit
 
 logger = logging.getLogger(__name__)
 
+# Sample rate all features are extracted at
+FEATURE_SR = 22050
+
 
 # ---------------------------------------------------------------------------
 # Vocal isolation
 # ---------------------------------------------------------------------------
 
-def isolate_vocals(
-    audio_path: str,
-    output_dir: str,
-    model: str = "htdemucs_ft",
-) -> tuple[str, str]:
-    """Run Demucs to separate vocals from a mix.
-
-    Args:
-        audio_path: Path to the input audio file.
-        output_dir: Directory where separated stems will be written.
-        model:      Demucs model name (default: htdemucs_ft for best quality).
+def load_demucs_model(model: str = "htdemucs_ft", device: Optional[str] = None):
+    """Load a pretrained Demucs model (or bag) onto the GPU if available.
 
-    Returns:
-        Tuple of (vocal_path, accompaniment_path) — paths to the isolated
-        vocal and no_vocals (accompaniment) WAV files.
+    Meant to be called once per container; pass the result to
+    isolate_vocals_bytes_batch for each batch of tracks. With *device* given,
+    the model is placed there instead (e.g. "cpu" before a memory snapshot;
+    move it later with demucs_model_to_device).
     """
-    logger.info("Running Demucs vocal isolation: model=%s, input=%s", model, audio_path)
-
-    # demucs.separate expects sys.argv-style args
-    from demucs.separate import main as demucs_main
-
-    args = [
-        "--two-stems", "vocals",
-        "-n", model,
-        "-o", output_dir,
-        "--filename", "{stem}.{ext}",
-        audio_path,
-    ]
-
-    try:
-        demucs_main(args)
-    except SystemExit:
-        # demucs calls sys.exit(0) on success
-        pass
-
-    # The output tree is: <output_dir>/<model>/<track_name>/vocals.wav
-    # and <output_dir>/<model>/<track_name>/no_vocals.wav
-    track_name = Path(audio_path).stem
-    vocal_path = os.path.join(output_dir, model, track_name, "vocals.wav")
-    accompaniment_path = os.path.join(output_dir, model, track_name, "no_vocals.wav")
-
-    if not os.path.isfile(vocal_path):
-        # Search for any vocals file in the output directory
-        logger.warning("Expected vocal file not at %s, searching...", vocal_path)
-        found = None
-        for root, dirs, files in os.walk(output_dir):
-            for f in files:
-                if f.lower() == "vocals.wav":
-                    found = os.path.join(root, f)
-                    break
-            if found:
-                break
-        if found:
-            vocal_path = found
-            logger.info("Found vocal file at: %s", vocal_path)
-        else:
-            # List what was actually produced for debugging
-            all_files = []
-            for root, dirs, files in os.walk(output_dir):
-                for f in files:
-                    all_files.append(os.path.join(root, f))
-            raise FileNotFoundError(
-                f"Demucs did not produce vocal file. Output dir contents: {all_files}"
+    from demucs.pretrained import get_model
+
+    logger.info("Loading Demucs model %s", model)
+    demucs_model = get_model(model)
+    demucs_model.eval()
+    return demucs_model_to_device(demucs_model, device)
+
+
+def demucs_model_to_device(demucs_model, device: Optional[str] = None):
+    """Move a loaded Demucs model to *device* (default: GPU if available)."""
+    import torch
+
+    if device is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        if device == "cpu":
+            # GPU workers should never get here; htdemucs runs ~1x realtime on CPU
+            logger.warning("No CUDA GPU available, Demucs will run on CPU")
+    if device == "cuda":
+        props = torch.cuda.get_device_properties(0)
+        logger.info("Demucs GPU: %s (%.1f GB)", props.name, props.total_memory / 1024 ** 3)
+        # TF32 tensor cores for matmul/conv (Ampere+, e.g. A10G; no-op on T4).
+        # apply_model feeds fixed-length segments, so cuDNN autotuning pays
+        # off after the first segment.
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.allow_tf32 = True
+        torch.backends.cudnn.benchmark = True
+    logger.info("Demucs model on %s", device)
+    demucs_model.to(device)
+    return demucs_model
+
+
+# On CUDA out-of-memory, separation is retried with half the segment length,
+# down to this many seconds.
+_DEMUCS_MIN_SEGMENT_S = 1.0
+
+
+def _demucs_segment_s(demucs_model) -> float:
+    """Default segment length (s) of a Demucs model or bag of models."""
+    models = getattr(demucs_model, "models", [demucs_model])
+    return min(float(m.segment) for m in models)
+
+
+def _separate_vocals_batch(demucs_model, wavs: list) -> list[tuple]:
+    """Run a loaded Demucs model on (channels, samples) tensors in one pass.
+
+    Applies the same normalisation and shifts/overlap defaults as
+    ``demucs.separate`` and returns (vocals, accompaniment) CPU tensors per
+    track. Each track is normalised on its own, zero-padded to the longest
+    one and stacked along the batch dimension, so the GPU runs every segment
+    for all tracks at once. Outputs are cropped back to each track's length.
+    """
+    import torch
+    from demucs.apply import apply_model
+
+    device = next(demucs_model.parameters()).device
+    segment = None  # the model's training length (7.8 s for htdemucs)
+    refs = [wav.mean(0) for wav in wavs]
+    stats = [(ref.mean(), ref.std()) for ref in refs]
+    length = max(wav.shape[-1] for wav in wavs)
+    batch = torch.zeros(len(wavs), wavs[0].shape[0], length)
+    for i, (wav, (mean, std)) in enumerate(zip(wavs, stats)):
+        batch[i, :, : wav.shape[-1]] = (wav - mean) / std
+
+    while True:
+        try:
+            with torch.no_grad():
+                sources = apply_model(
+                    demucs_model, batch, device=device, shifts=1, split=True,
+                    overlap=0.25, progress=False, segment=segment,
+                )
+            break
+        except torch.cuda.OutOfMemoryError:
+            # Segments are separated one at a time and overlap-added, so
+            # peak VRAM follows the segment length, not the song length.
+            current = segment or _demucs_segment_s(demucs_model)
+            if current / 2 < _DEMUCS_MIN_SEGMENT_S:
+                raise
+            segment = current / 2
+            torch.cuda.empty_cache()
+            logger.warning(
+                "Demucs out of GPU memory on %d track(s); retrying with %.2fs segments",
+                len(wavs), segment,
             )
 
-    if not os.path.isfile(accompaniment_path):
-        # Search for no_vocals file
-        logger.warning("Expected accompaniment not at %s, searching...", accompaniment_path)
-        found = None
-        for root, dirs, files in os.walk(output_dir):
-            for f in files:
-                if "no_vocal" in f.lower():
-                    found = os.path.join(root, f)
-                    break
-            if found:
-                break
-        if found:
-            accompaniment_path = found
-            logger.info("Found accompaniment at: %s", accompaniment_path)
-        else:
-            logger.warning("No accompaniment file found — will return empty path")
-            accompaniment_path = ""
+    vocal_idx = demucs_model.sources.index("vocals")
+    results = []
+    for i, (wav, (mean, std)) in enumerate(zip(wavs, stats)):
+        track = sources[i, :, :, : wav.shape[-1]] * std + mean
+        vocals = track[vocal_idx]
+        accompaniment = track.sum(0) - vocals
+        results.append((vocals.cpu(), accompaniment.cpu()))
+    return results
 
-    logger.info("Vocal isolation complete: vocals=%s, accompaniment=%s", vocal_path, accompaniment_path)
-    return vocal_path, accompaniment_path
 
+def _decode_for_demucs(audio_bytes: bytes, samplerate: int, channels: int):
+    """Decode any audio format from memory to a float (channels, samples) tensor.
 
-def isolate_vocals_fast(
-    audio_path: str,
-    output_dir: str,
-) -> tuple[str, str]:
-    """Fast stem separation using htdemucs (not htdemucs_ft).
-
-    ~2-3x faster, good enough for karaoke/practice playback.
+    In-memory counterpart of ``demucs.audio.AudioFile.read``: PyAV decodes and
+    resamples in-process instead of ffmpeg reading a file.
+    """
+    import av
+    import torch
+
+    chunks = []
+    with av.open(io.BytesIO(audio_bytes)) as container:
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(
+            format="fltp", layout="stereo" if channels == 2 else "mono", rate=samplerate
+        )
+        for frame in container.decode(stream):
+            for out in resampler.resample(frame):
+                chunks.append(out.to_ndarray())
+        for out in resampler.resample(None):
+            chunks.append(out.to_ndarray())
+
+    if not chunks:
+        return torch.zeros(channels, 0)
+    return torch.from_numpy(np.concatenate(chunks, axis=1))
+
+
+def _encode_demucs_wav(wav, samplerate: int) -> bytes:
+    """Encode a clipped stem as 16-bit WAV bytes, as demucs' save_audio does."""
+    import soundfile as sf
+    from demucs.audio import i16_pcm
+
+    buf = io.BytesIO()
+    sf.write(buf, i16_pcm(wav).t().numpy(), samplerate, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
+
+
+def isolate_vocals_bytes_batch(
+    demucs_model, audio_bytes_list: list[bytes], return_exceptions: bool = False,
+) -> list:
+    """Separate vocals for several tracks in one batched model pass.
+
+    Mirrors ``demucs.separate --two-stems vocals`` (same normalisation,
+    shifts/overlap defaults and 16-bit "rescale" WAV output), from and to
+    memory with no temp files. Each input is decoded from any container PyAV
+    reads; each result is (vocals WAV bytes, accompaniment WAV bytes, vocal
+    stem as a float32 (channels, samples) array at the model's sample rate),
+    so callers can analyse the stem without decoding the WAV again.
+
+    With *return_exceptions*, a track that fails to decode gets its exception
+    in place of a result (as with asyncio.gather) and the other tracks are
+    still separated; otherwise the first failure is raised.
     """
-    return isolate_vocals(audio_path, output_dir, model="htdemucs")
+    from demucs.audio import prevent_clip
+
+    logger.info(
+        "Running Demucs vocal isolation (preloaded model): %d track(s), %d bytes",
+        len(audio_bytes_list), sum(len(b) for b in audio_bytes_list),
+    )
+    sr = demucs_model.samplerate
+    results: list = []
+    for audio_bytes in audio_bytes_list:
+        try:
+            results.append(_decode_for_demucs(audio_bytes, sr, demucs_model.audio_channels))
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            logger.warning("Could not decode track for Demucs: %s", exc)
+            results.append(exc)
+
+    decoded = [i for i, wav in enumerate(results) if not isinstance(wav, Exception)]
+    if not decoded:
+        return results
+    stems = _separate_vocals_batch(demucs_model, [results[i] for i in decoded])
+    for i, (vocals, accompaniment) in zip(decoded, stems):
+        vocals = prevent_clip(vocals, mode="rescale")
+        accompaniment = prevent_clip(accompaniment, mode="rescale")
+        results[i] = (
+            _encode_demucs_wav(vocals, sr),
+            _encode_demucs_wav(accompaniment, sr),
+            vocals.numpy(),
+        )
+    return results
 
 
 # ---------------------------------------------------------------------------
 # Feature extraction
 # ---------------------------------------------------------------------------
 
-def extract_features(audio_path: str, sr: int = 22050) -> dict:
-    """Extract pitch, onset, and energy features from an audio file.
+# Extracted features are cached on local disk by a hash of the input signal,
+# so re-analysing the same audio in a warm container (job retries, a
+# reference prepared twice) skips Praat and librosa. Bump the version when
+# extraction output changes; FEATURES_CACHE_DISABLE=1 turns the cache off.
+_FEATURES_CACHE_VERSION = 1
+_FEATURES_CACHE_DIR = os.environ.get(
+    "FEATURES_CACHE_DIR", os.path.join(tempfile.gettempdir(), "choirmind-features")
+)
+_FEATURES_CACHE_ENABLED = os.environ.get("FEATURES_CACHE_DISABLE") != "1"
+_FEATURES_CACHE_MAX_FILES = 512
+
+
+def extract_features_from_array(
+    y: np.ndarray,
+    sr: int,
+    target_sr: int = FEATURE_SR,
+    use_cache: bool = True,
+) -> dict:
+    """Extract features from an already-decoded float signal.
 
     Args:
-        audio_path: Path to WAV/MP3 audio.
-        sr:         Target sample rate.
+        y:         Audio samples, mono or (n_samples, n_channels) as returned
+                   by soundfile.
+        sr:        Sample rate of *y*.
+        target_sr: Rate to analyse at; *y* is downmixed and resampled the
+                   same way librosa.load would.
+        use_cache: Read and write the local features cache (see
+                   _FEATURES_CACHE_DIR).
 
     Returns:
         Dictionary with pitch_values, pitch_times, onset_times,
-        rms_values, rms_times, and duration_s.
+        rms_values, rms_times (numpy arrays), and duration_s.
     """
     import time as _time
-    logger.info("Extracting features from %s (sr=%d)", audio_path, sr)
+    y = np.ascontiguousarray(y, dtype=np.float32)
 
-    t0 = _time.time()
-    y, sr = librosa.load(audio_path, sr=sr)
+    cache_path = (
+        _features_cache_path(y, sr, target_sr)
+        if use_cache and _FEATURES_CACHE_ENABLED else None
+    )
+    if cache_path:
+        cached = _load_cached_features(cache_path)
+        if cached is not None:
+            logger.info("[FEAT] cache hit: %s", os.path.basename(cache_path))
+            return cached
+
+    if y.ndim > 1:
+        y = y.mean(axis=1)
+    if sr != target_sr:
+        y = librosa.resample(y, orig_sr=sr, target_sr=target_sr)
+        sr = target_sr
+    y = np.ascontiguousarray(y, dtype=np.float32)
     duration_s = len(y) / sr
-    logger.info("[FEAT] librosa.load: %.1fs", _time.time() - t0)
 
     # -- Pitch extraction via Parselmouth (Praat) --
     # Use 0.02s time step (50fps) instead of 0.01s — halves frames, minimal quality loss
@@ -161,6 +288,10 @@ def extract_features(audio_path: str, sr: int = 22050) -> dict:
     pitch_values_clean = np.where(pitch_values == 0, np.nan, pitch_values)
 
     # -- Onset detection --
+    # Praat (C++) pitch tracking dominates this function; librosa's onset
+    # and RMS passes below take ~0.2 s per 3 minutes of audio, and a C-backed
+    # replacement (audioFlux/torchaudio) would shift onset frames and RMS
+    # values that reference features on S3 were extracted with.
     t2 = _time.time()
     onset_frames = librosa.onset.onset_detect(
         y=y, sr=sr, units="frames",
@@ -178,14 +309,16 @@ def extract_features(audio_path: str, sr: int = 22050) -> dict:
 
     # Normalise RMS to 0-1 range for comparability
     rms_max = rms.max()
-    rms_norm = (rms / rms_max).tolist() if rms_max > 0 else rms.tolist()
+    rms_norm = rms / rms_max if rms_max > 0 else rms
 
+    # Arrays are handed through as-is (float64 pitch/times from Praat and
+    # librosa, float32 RMS); features_to_json converts at the boundary.
     features = {
-        "pitch_values": pitch_values_clean.tolist(),
-        "pitch_times": pitch_times.tolist(),
-        "onset_times": onset_times.tolist(),
+        "pitch_values": pitch_values_clean,
+        "pitch_times": pitch_times,
+        "onset_times": onset_times,
         "rms_values": rms_norm,
-        "rms_times": rms_times.tolist(),
+        "rms_times": rms_times,
         "duration_s": round(duration_s, 4),
     }
     logger.info(
@@ -194,14 +327,77 @@ def extract_features(audio_path: str, sr: int = 22050) -> dict:
         len(onset_times),
         duration_s,
     )
+    if cache_path:
+        _store_cached_features(cache_path, features)
     return features
 
 
+def _features_cache_path(y: np.ndarray, sr: int, target_sr: int) -> str:
+    """Cache file for features of signal *y* (C-contiguous float32)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{_FEATURES_CACHE_VERSION}:{sr}:{target_sr}:{y.shape}".encode())
+    h.update(y.data)
+    return os.path.join(_FEATURES_CACHE_DIR, f"feat_{h.hexdigest()}.npz")
+
+
+def _load_cached_features(path: str) -> Optional[dict]:
+    """Read a cached features dict, or None on a miss or unreadable file."""
+    try:
+        with open(path, "rb") as f:
+            return features_from_npz(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning("Ignoring unreadable features cache %s: %s", path, exc)
+        return None
+
+
+def _store_cached_features(path: str, features: dict) -> None:
+    """Write features losslessly (native dtypes) and trim the cache directory.
+
+    Written to a temp file and renamed, so concurrent readers never see a
+    partial file. Failures only cost the cache entry.
+    """
+    try:
+        os.makedirs(_FEATURES_CACHE_DIR, exist_ok=True)
+        buf = io.BytesIO()
+        np.savez(buf, **{key: np.asarray(value) for key, value in features.items()})
+        fd, tmp = tempfile.mkstemp(dir=_FEATURES_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(buf.getbuffer())
+        os.replace(tmp, path)
+
+        entries = [e for e in os.scandir(_FEATURES_CACHE_DIR) if e.name.endswith(".npz")]
+        if len(entries) > _FEATURES_CACHE_MAX_FILES:
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            for entry in entries[: len(entries) - _FEATURES_CACHE_MAX_FILES]:
+                os.unlink(entry.path)
+    except OSError as exc:
+        logger.warning("Could not write features cache %s: %s", path, exc)
+
+
+def warmup_features() -> None:
+    """Run feature extraction once on a short tone.
+
+    The first librosa onset/RMS call JIT-compiles numba helpers and resolves
+    lazy submodules (~1.5 s); doing it up front keeps that off user requests.
+    Bypasses the features cache: a hit would skip exactly that work, and the
+    image build (which also calls this) must not leave an entry behind.
+    """
+    t = np.arange(FEATURE_SR, dtype=np.float32) / FEATURE_SR
+    tone = 0.3 * np.sin(2 * np.pi * 220.0 * t).astype(np.float32)
+    extract_features_from_array(tone, FEATURE_SR, use_cache=False)
+
+
 # ---------------------------------------------------------------------------
 # DTW alignment
 # ---------------------------------------------------------------------------
 
-def align_features(user_features: dict, ref_features: dict) -> dict:
+def align_features(
+    user_features: dict,
+    ref_features: dict,
+    window: Optional[int] = None,
+) -> dict:
     """Align a user recording to a reference using Dynamic Time Warping.
 
     Uses a 3-layer defense against alignment drift:
@@ -210,8 +406,10 @@ def align_features(user_features: dict, ref_features: dict) -> dict:
       Layer 3: Post-DTW path sanity check (logging only for V1)
 
     Args:
-        user_features: Feature dict from extract_features (user recording).
-        ref_features:  Feature dict from extract_features (reference).
+        user_features: extract_features_from_array dict (user recording).
+        ref_features:  extract_features_from_array dict (reference).
+        window:        Sakoe-Chiba band half-width in frames. Defaults to
+                       max(50, 10% of the longer sequence).
 
     Returns:
         Dictionary with:
@@ -230,12 +428,9 @@ def align_features(user_features: dict, ref_features: dict) -> dict:
     # --- (a) Trim reference to user duration + 20% margin ---
     max_ref_dur = user_dur * 1.2 + 5.0  # e.g. 20s recording → 29s of ref
     ref_pitch_raw = ref_features["pitch_values"]
-    ref_times_raw = ref_features.get("pitch_times", [])
-    if ref_dur > max_ref_dur and ref_times_raw:
-        cut_idx = next(
-            (i for i, t in enumerate(ref_times_raw) if t > max_ref_dur),
-            len(ref_times_raw),
-        )
+    ref_times_raw = ref_features.get("pitch_times", np.empty(0))
+    if ref_dur > max_ref_dur and len(ref_times_raw):
+        cut_idx = int(np.searchsorted(ref_times_raw, max_ref_dur, side="right"))
         ref_pitch_raw = ref_pitch_raw[:cut_idx]
         logger.info(
             "Trimmed reference from %.1fs (%d frames) to %.1fs (%d frames)",
@@ -244,29 +439,23 @@ def align_features(user_features: dict, ref_features: dict) -> dict:
     else:
         cut_idx = None
 
-    # --- (b) Build pitch arrays ---
-    user_pitch = np.array(user_features["pitch_values"])
-    ref_pitch = np.array(ref_pitch_raw)
+    # --- (b) Pitch arrays (features hold ndarrays; slicing is a view) ---
+    user_pitch = user_features["pitch_values"]
+    ref_pitch = ref_pitch_raw
 
-    # --- (c) Build time and RMS arrays (moved before onset detection) ---
-    user_times = np.array(user_features["pitch_times"])
-    ref_times = np.array(ref_times_raw[:cut_idx] if cut_idx else ref_times_raw)
+    # --- (c) Time and RMS arrays (moved before onset detection) ---
+    user_times = user_features["pitch_times"]
+    ref_times = ref_times_raw[:cut_idx] if cut_idx else ref_times_raw
 
-    user_rms = np.array(user_features["rms_values"])
-    user_rms_times = np.array(user_features["rms_times"])
+    user_rms = user_features["rms_values"]
+    user_rms_times = user_features["rms_times"]
 
-    ref_rms_raw = ref_features["rms_values"]
-    ref_rms_times_raw = ref_features["rms_times"]
-    if cut_idx and ref_rms_times_raw:
-        rms_cut = next(
-            (i for i, t in enumerate(ref_rms_times_raw) if t > max_ref_dur),
-            len(ref_rms_times_raw),
-        )
-        ref_rms = np.array(ref_rms_raw[:rms_cut])
-        ref_rms_times = np.array(ref_rms_times_raw[:rms_cut])
-    else:
-        ref_rms = np.array(ref_rms_raw)
-        ref_rms_times = np.array(ref_rms_times_raw)
+    ref_rms = ref_features["rms_values"]
+    ref_rms_times = ref_features["rms_times"]
+    if cut_idx and len(ref_rms_times):
+        rms_cut = int(np.searchsorted(ref_rms_times, max_ref_dur, side="right"))
+        ref_rms = ref_rms[:rms_cut]
+        ref_rms_times = ref_rms_times[:rms_cut]
 
     # --- (d) Layer 1: Detect singing onset (leading noise trimming) ---
     singing_onset = _detect_singing_onset(
@@ -276,10 +465,7 @@ def align_features(user_features: dict, ref_features: dict) -> dict:
     # --- (e) Trim user arrays if singing_onset > 0.2s ---
     user_frame_offset = 0
     if singing_onset > 0.2 and len(user_times) > 0:
-        trim_idx = next(
-            (i for i, t in enumerate(user_times) if t >= singing_onset),
-            0,
-        )
+        trim_idx = int(np.searchsorted(user_times, singing_onset, side="left"))
         if 0 < trim_idx < len(user_pitch):
             user_frame_offset = trim_idx
             user_pitch_dtw = user_pitch[trim_idx:]
@@ -309,8 +495,10 @@ def align_features(user_features: dict, ref_features: dict) -> dict:
     user_seq = _build_dtw_features(user_pitch_dtw, user_rms_dtw_interp)
     ref_seq = _build_dtw_features(ref_pitch, ref_rms_interp)
 
-    # --- (g) Run FastDTW on 3D vectors ---
-    distance, path = fastdtw(user_seq, ref_seq, dist=euclidean, radius=50)
+    # --- (g) Run banded DTW on 3D vectors ---
+    if window is None:
+        window = max(50, int(0.1 * max(len(user_seq), len(ref_seq))))
+    distance, path = _banded_dtw(user_seq, ref_seq, window)
 
     # --- (h) Shift path indices back by user_frame_offset ---
     if user_frame_offset > 0:
@@ -321,56 +509,20 @@ def align_features(user_features: dict, ref_features: dict) -> dict:
         )
 
     # --- (i) Compute per-pair deviations (uses original full arrays) ---
-    pitch_deviations = []  # in cents
-    raw_timing_offsets = []  # in seconds (before normalization)
-    energy_ratios = []  # user/ref ratio
-
-    for u_idx, r_idx in path:
-        # -- Pitch deviation in cents --
-        u_f = user_pitch[u_idx] if u_idx < len(user_pitch) else np.nan
-        r_f = ref_pitch[r_idx] if r_idx < len(ref_pitch) else np.nan
-
-        if np.isnan(u_f) or np.isnan(r_f) or u_f <= 0 or r_f <= 0:
-            pitch_deviations.append(None)  # unvoiced
-        else:
-            cents_raw = 1200.0 * np.log2(u_f / r_f)
-            cents = ((cents_raw + 600) % 1200) - 600  # fold to nearest octave
-            pitch_deviations.append(round(float(cents), 2))
-
-        # -- Timing offset (raw, before normalization) --
-        u_t = user_times[u_idx] if u_idx < len(user_times) else 0.0
-        r_t = ref_times[r_idx] if r_idx < len(ref_times) else 0.0
-        raw_timing_offsets.append(float(u_t - r_t))
-
-        # -- Energy ratio --
-        u_rms_idx = _nearest_idx(user_rms_times, u_t) if u_idx < len(user_times) else 0
-        r_rms_idx = _nearest_idx(ref_rms_times, r_t) if r_idx < len(ref_times) else 0
-
-        u_e = user_rms[u_rms_idx] if u_rms_idx < len(user_rms) else 0.0
-        r_e = ref_rms[r_rms_idx] if r_rms_idx < len(ref_rms) else 0.0
-
-        if r_e > 1e-6:
-            energy_ratios.append(round(float(u_e / r_e), 4))
-        else:
-            energy_ratios.append(None)
+    # Pitch deviations in cents, computed for the whole path in one pass
+    pitch_deviations = _path_pitch_deviations(path, user_pitch, ref_pitch)
+    # Raw timing offsets in seconds (before normalization) and user/ref
+    # energy ratios, likewise vectorised over the path
+    raw_timing_offsets, energy_ratios = _path_timing_and_energy(
+        path, user_times, ref_times,
+        user_rms_times, user_rms, ref_rms_times, ref_rms,
+    )
 
     # --- (j) Deduplicate path by user index ---
     # DTW with mismatched lengths creates many ref frames bunched onto single
     # user frames.  Keep only one pair per unique user index (smallest pitch
     # deviation) so timing offsets reflect true 1:1 alignment quality.
-    dedup: dict[int, int] = {}  # u_idx -> best pair_idx
-    for pair_idx, (u_idx, r_idx) in enumerate(path):
-        if u_idx not in dedup:
-            dedup[u_idx] = pair_idx
-        else:
-            existing_dev = pitch_deviations[dedup[u_idx]]
-            current_dev = pitch_deviations[pair_idx]
-            ex_abs = abs(existing_dev) if existing_dev is not None else 999
-            cu_abs = abs(current_dev) if current_dev is not None else 999
-            if cu_abs < ex_abs:
-                dedup[u_idx] = pair_idx
-
-    keep = sorted(dedup.values())
+    keep = _dedup_path_by_user(path, pitch_deviations)
     path_dedup = [path[i] for i in keep]
     pitch_deviations = [pitch_deviations[i] for i in keep]
     raw_timing_offsets = [raw_timing_offsets[i] for i in keep]
@@ -424,13 +576,317 @@ def align_features(user_features: dict, ref_features: dict) -> dict:
     return alignment
 
 
+# ---------------------------------------------------------------------------
+# Banded DTW
+# ---------------------------------------------------------------------------
+
+# fastmath without nnan/ninf: the recurrence relies on comparisons against inf
+# for cells outside the band.
+_DTW_FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+# Backtrack directions stored per band cell
+_STEP_DIAG = 0   # from (i-1, j-1)
+_STEP_UP = 1     # from (i-1, j)
+_STEP_LEFT = 2   # from (i, j-1)
+
+
+@njit(cache=True, fastmath=_DTW_FASTMATH, boundscheck=False)
+def _frame_distance(x, i, y, j):
+    """Euclidean distance between frames x[i] and y[j]."""
+    d = 0.0
+    for f in range(x.shape[1]):
+        diff = x[i, f] - y[j, f]
+        d += diff * diff
+    return np.sqrt(d)
+
+
+@njit(cache=True, fastmath=_DTW_FASTMATH, boundscheck=False)
+def _centre_path_cost(x, y, lo, window):
+    """Cost of the staircase warping path along the band's centre line.
+
+    Row i covers columns c(i-1)+1 .. c(i) (or just c(i) when the centre
+    doesn't move), with c(i) = lo[i] + window and the last row running out
+    to m-1. This is a valid path, so its cost bounds the DTW distance from
+    above. Returns inf if the band is too narrow for the path to stay
+    inside it.
+    """
+    n = x.shape[0]
+    m = y.shape[0]
+    total = 0.0
+    c_prev = -1
+    for i in range(n):
+        c = m - 1 if i == n - 1 else min(lo[i] + window, m - 1)
+        j = c_prev + 1 if c > c_prev else c
+        if j < lo[i] or c > lo[i] + 2 * window:
+            return np.inf
+        while j <= c:
+            total += _frame_distance(x, i, y, j)
+            j += 1
+        c_prev = c
+    return total
+
+
+@njit(cache=True, fastmath=_DTW_FASTMATH, boundscheck=False)
+def _banded_dtw_kernel(x, y, window):
+    """Sakoe-Chiba banded DTW over euclidean frame distances.
+
+    The band follows the scaled diagonal j ~ i * (m-1)/(n-1) with half-width
+    *window*. Costs live in two rolling rows of size 2*window+1 (prev/curr
+    swapped per row), so memory is O(n * window) for the int8 backtrack
+    matrix and O(window) for costs.
+
+    Cells are pruned as in PrunedDTW: with the centre-line path cost as an
+    upper bound, each row starts at the first column the previous row kept
+    under the bound, and stops once it is past the previous row's last such
+    column and its own cost exceeds the bound. Skipped cells stay inf; none
+    of them can be on the optimal path.
+
+    Returns (distance, path_i, path_j).
+    """
+    n = x.shape[0]
+    m = y.shape[0]
+    width = 2 * window + 1
+    inf = np.inf
+
+    scale = (m - 1) / (n - 1) if n > 1 else 0.0
+    lo = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        lo[i] = int(i * scale + 0.5) - window
+
+    # Slack covers summation-order differences between the bound and the DP.
+    ub = _centre_path_cost(x, y, lo, window)
+    ub += ub * 1e-9 + 1e-9
+
+    steps = np.zeros((n, width), dtype=np.int8)
+    prev = np.full(width, inf)
+    curr = np.full(width, inf)
+    start = 0       # first column of the previous row within the bound
+    end_prev = -1   # last column of the previous row within the bound
+
+    for i in range(n):
+        lo_i = lo[i]
+        for k in range(width):
+            curr[k] = inf
+        next_start = -1
+        next_end = -1
+        for j in range(max(lo_i, 0, start), min(lo_i + width, m)):
+            k = j - lo_i
+            d = _frame_distance(x, i, y, j)
+
+            if i == 0 and j == 0:
+                cost = d
+            else:
+                best = inf
+                step = _STEP_DIAG
+                if i > 0:
+                    kp = j - 1 - lo[i - 1]
+                    if 0 <= kp < width and prev[kp] < best:
+                        best = prev[kp]
+                        step = _STEP_DIAG
+                    kp = j - lo[i - 1]
+                    if 0 <= kp < width and prev[kp] < best:
+                        best = prev[kp]
+                        step = _STEP_UP
+                if k > 0 and curr[k - 1] < best:
+                    best = curr[k - 1]
+                    step = _STEP_LEFT
+                cost = d + best
+                steps[i, k] = step
+            curr[k] = cost
+
+            if cost <= ub:
+                if next_start < 0:
+                    next_start = j
+                next_end = j
+            elif j > end_prev:
+                # Only reachable from the left from here on: all over the bound
+                break
+        start = max(next_start, 0)
+        end_prev = next_end
+        prev, curr = curr, prev
+
+    distance = prev[(m - 1) - lo[n - 1]]
+    if not distance < inf:
+        # End cell unreachable within the band: no path to backtrack
+        empty = np.empty(0, dtype=np.int32)
+        return distance, empty, empty
+
+    path_i = np.empty(n + m, dtype=np.int32)
+    path_j = np.empty(n + m, dtype=np.int32)
+    i = n - 1
+    j = m - 1
+    count = 0
+    while True:
+        path_i[count] = i
+        path_j[count] = j
+        count += 1
+        if i == 0 and j == 0:
+            break
+        step = steps[i, j - lo[i]]
+        if step == _STEP_DIAG:
+            i -= 1
+            j -= 1
+        elif step == _STEP_UP:
+            i -= 1
+        else:
+            j -= 1
+
+    return distance, path_i[:count][::-1], path_j[:count][::-1]
+
+
+def _banded_dtw(
+    user_seq: np.ndarray,
+    ref_seq: np.ndarray,
+    window: int,
+) -> tuple[float, list[tuple[int, int]]]:
+    """Run banded DTW and return (distance, [(user_idx, ref_idx), ...])."""
+    x = np.ascontiguousarray(user_seq, dtype=np.float64)
+    y = np.ascontiguousarray(ref_seq, dtype=np.float64)
+    if len(x) == 0 or len(y) == 0:
+        raise ValueError("Cannot align empty feature sequences")
+
+    # The band centre advances up to ceil(m/n) columns per row (or stalls for
+    # n/m rows); narrower than that, consecutive rows' bands don't touch and
+    # the end cell is unreachable. A single-frame side makes the band span
+    # the other sequence entirely.
+    n, m = len(x), len(y)
+    window = max(1, int(window), math.ceil(max(m / n, n / m)) + 1)
+
+    distance, path_i, path_j = _banded_dtw_kernel(x, y, window)
+    if len(path_i) == 0:
+        raise ValueError(
+            f"DTW end cell unreachable for {n}x{m} frames with window {window}"
+        )
+    return float(distance), list(zip(path_i.tolist(), path_j.tolist()))
+
+
+def warmup_dtw() -> None:
+    """Compile (or load from NUMBA_CACHE_DIR) the alignment kernels ahead of use."""
+    dummy = np.zeros((2, 3), dtype=np.float64)
+    _banded_dtw(dummy, dummy, 1)
+    pitch = np.full(8, 220.0)
+    _detect_singing_onset(pitch, np.arange(8) * 0.02, pitch, np.arange(8) * 0.02)
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _nearest_idx(arr: np.ndarray, value: float) -> int:
-    """Return the index of the element in *arr* closest to *value*."""
-    return int(np.argmin(np.abs(arr - value)))
+def _path_pitch_deviations(
+    path: list,
+    user_pitch: np.ndarray,
+    ref_pitch: np.ndarray,
+) -> list:
+    """Octave-folded pitch deviation in cents for each (u, r) path pair.
+
+    Pairs where either side is unvoiced (NaN, <= 0) or out of range are None.
+    """
+    if not path:
+        return []
+    pairs = np.asarray(path, dtype=np.int64)
+    u_idx, r_idx = pairs[:, 0], pairs[:, 1]
+
+    u_f = np.full(len(pairs), np.nan)
+    r_f = np.full(len(pairs), np.nan)
+    u_ok = u_idx < len(user_pitch)
+    r_ok = r_idx < len(ref_pitch)
+    u_f[u_ok] = user_pitch[u_idx[u_ok]]
+    r_f[r_ok] = ref_pitch[r_idx[r_ok]]
+
+    voiced = ~np.isnan(u_f) & ~np.isnan(r_f) & (u_f > 0) & (r_f > 0)
+    cents = np.full(len(pairs), np.nan)
+    cents_raw = 1200.0 * np.log2(u_f[voiced] / r_f[voiced])
+    cents[voiced] = ((cents_raw + 600) % 1200) - 600  # fold to nearest octave
+
+    return [
+        round(float(c), 2) if ok else None
+        for c, ok in zip(cents.tolist(), voiced.tolist())
+    ]
+
+
+def _dedup_path_by_user(path: list, pitch_deviations: list) -> list:
+    """Indices of the pairs to keep: one per user frame, in path order.
+
+    Within each user frame the pair with the smallest |pitch deviation|
+    wins (unvoiced counts as 999 cents); ties keep the earliest pair.
+    A stable sort by (user index, |deviation|) puts each frame's winner
+    first in its group.
+    """
+    if not path:
+        return []
+    u_idx = np.asarray(path, dtype=np.int64)[:, 0]
+    dev = np.array(pitch_deviations, dtype=np.float64)  # None -> nan
+    abs_dev = np.where(np.isnan(dev), 999.0, np.abs(dev))
+
+    order = np.lexsort((abs_dev, u_idx))
+    u_sorted = u_idx[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = u_sorted[1:] != u_sorted[:-1]
+    return np.sort(order[first]).tolist()
+
+
+def _path_timing_and_energy(
+    path: list,
+    user_times: np.ndarray,
+    ref_times: np.ndarray,
+    user_rms_times: np.ndarray,
+    user_rms: np.ndarray,
+    ref_rms_times: np.ndarray,
+    ref_rms: np.ndarray,
+) -> tuple[list, list]:
+    """Timing offset (s) and energy ratio (user/ref) for each (u, r) path pair.
+
+    Frames past the end of a times array count as t=0 with RMS frame 0.
+    Energy ratios are None where the reference RMS is ~0.
+    """
+    if not path:
+        return [], []
+    pairs = np.asarray(path, dtype=np.int64)
+    u_idx, r_idx = pairs[:, 0], pairs[:, 1]
+
+    u_ok = u_idx < len(user_times)
+    r_ok = r_idx < len(ref_times)
+    u_t = np.zeros(len(pairs))
+    r_t = np.zeros(len(pairs))
+    u_t[u_ok] = user_times[u_idx[u_ok]]
+    r_t[r_ok] = ref_times[r_idx[r_ok]]
+
+    u_rms_idx = np.zeros(len(pairs), dtype=np.int64)
+    r_rms_idx = np.zeros(len(pairs), dtype=np.int64)
+    u_rms_idx[u_ok] = _nearest_indices(user_rms_times, u_t[u_ok])
+    r_rms_idx[r_ok] = _nearest_indices(ref_rms_times, r_t[r_ok])
+
+    u_e = np.zeros(len(pairs))
+    r_e = np.zeros(len(pairs))
+    u_e_ok = u_rms_idx < len(user_rms)
+    r_e_ok = r_rms_idx < len(ref_rms)
+    u_e[u_e_ok] = user_rms[u_rms_idx[u_e_ok]]
+    r_e[r_e_ok] = ref_rms[r_rms_idx[r_e_ok]]
+
+    has_ref = r_e > 1e-6
+    ratios = np.zeros(len(pairs))
+    ratios[has_ref] = u_e[has_ref] / r_e[has_ref]
+
+    return (
+        (u_t - r_t).tolist(),
+        [
+            round(v, 4) if ok else None
+            for v, ok in zip(ratios.tolist(), has_ref.tolist())
+        ],
+    )
+
+
+def _nearest_indices(arr: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Index of the element of sorted *arr* closest to each of *values*.
+
+    Binary search instead of a full |arr - value| scan per value; ties go
+    to the lower index, as argmin would pick.
+    """
+    if len(arr) < 2:
+        return np.zeros(len(values), dtype=np.int64)
+    hi = np.clip(np.searchsorted(arr, values), 1, len(arr) - 1)
+    lo = hi - 1
+    return np.where(values - arr[lo] <= arr[hi] - values, lo, hi)
 
 
 def _first_sustained_voicing(pitch: np.ndarray, min_consecutive: int = 5) -> int:
@@ -440,18 +896,11 @@ def _first_sustained_voicing(pitch: np.ndarray, min_consecutive: int = 5) -> int
     Returns 0 if no such run is found (conservative fallback).
     """
     voiced = (~np.isnan(pitch)) & (pitch > 0)
-    run_start = 0
-    run_len = 0
-    for i, v in enumerate(voiced):
-        if v:
-            if run_len == 0:
-                run_start = i
-            run_len += 1
-            if run_len >= min_consecutive:
-                return run_start
-        else:
-            run_len = 0
-    return 0
+    # Run boundaries: rising edges at even positions, falling at odd
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.view(np.int8), [0]))))
+    starts = edges[0::2]
+    long_runs = np.flatnonzero(edges[1::2] - starts >= min_consecutive)
+    return int(starts[long_runs[0]]) if len(long_runs) else 0
 
 
 def _detect_singing_onset(
@@ -499,43 +948,76 @@ def _detect_singing_onset(
     ref_median_hz = float(np.median(ref_first_voiced))
 
     step = max(1, window_frames // 4)  # 25% overlap
-    for start in range(0, max_search_frames, step):
-        end = min(start + window_frames, len(user_pitch))
-        window = user_pitch[start:end]
+    voiced = (~np.isnan(user_pitch)) & (user_pitch > 0)
+    log_pitch = np.zeros(len(user_pitch))
+    log_pitch[voiced] = np.log2(user_pitch[voiced] / ref_median_hz)
+    start = _scan_onset_kernel(
+        user_pitch.astype(np.float64), voiced, log_pitch, ref_median_hz,
+        max_search_frames, window_frames, step,
+        voicing_thresh, stability_thresh_cents, pitch_match_cents,
+    )
+    if start < 0:
+        # No good window found — don't trim (conservative)
+        return 0.0
 
-        if len(window) == 0:
-            continue
+    # All checks passed — this is singing onset
+    return float(user_times[start]) if start < len(user_times) else 0.0
+
+
+@njit(cache=True, fastmath=True)
+def _scan_onset_kernel(
+    pitch, voiced, log_pitch, ref_median_hz,
+    max_search_frames, window_frames, step,
+    voicing_thresh, stability_thresh_cents, pitch_match_cents,
+):
+    """First window start passing the _detect_singing_onset checks, or -1.
+
+    *log_pitch* is log2(pitch / ref_median) on voiced frames (0 elsewhere).
+    Voiced counts and log-pitch sums come from prefix sums, so each window
+    costs O(1) until it reaches the median (pitch match) check. The std in
+    cents doesn't depend on the median it is measured from, so it is taken
+    directly from the log-pitch moments.
+    """
+    n = voiced.shape[0]
+    count = np.zeros(n + 1, dtype=np.int64)
+    total = np.zeros(n + 1)
+    total_sq = np.zeros(n + 1)
+    for i in range(n):
+        v = log_pitch[i] if voiced[i] else 0.0
+        count[i + 1] = count[i] + (1 if voiced[i] else 0)
+        total[i + 1] = total[i] + v
+        total_sq[i + 1] = total_sq[i] + v * v
 
-        voiced = window[(~np.isnan(window)) & (window > 0)]
+    for start in range(0, max_search_frames, step):
+        end = min(start + window_frames, n)
+        k = count[end] - count[start]
 
         # Check 1: enough voicing
-        voicing_ratio = len(voiced) / len(window)
-        if voicing_ratio < voicing_thresh:
+        if k / (end - start) < voicing_thresh:
             continue
 
         # Check 2: pitch stability (std dev in cents)
-        if len(voiced) < 3:
+        if k < 3:
             continue
-        median_hz = float(np.median(voiced))
-        if median_hz <= 0:
-            continue
-        cents_from_median = 1200.0 * np.log2(voiced / median_hz)
-        stability = float(np.std(cents_from_median))
-        if stability > stability_thresh_cents:
+        mean = (total[end] - total[start]) / k
+        var = (total_sq[end] - total_sq[start]) / k - mean * mean
+        if 1200.0 * np.sqrt(max(var, 0.0)) > stability_thresh_cents:
             continue
 
         # Check 3: pitch range match (octave-folded)
-        cents_diff = 1200.0 * np.log2(median_hz / ref_median_hz)
+        window = np.empty(k)
+        w = 0
+        for i in range(start, end):
+            if voiced[i]:
+                window[w] = pitch[i]
+                w += 1
+        cents_diff = 1200.0 * np.log2(np.median(window) / ref_median_hz)
         cents_diff_folded = abs(((cents_diff + 600) % 1200) - 600)
         if cents_diff_folded > pitch_match_cents:
             continue
 
-        # All checks passed — this is singing onset
-        onset_time = float(user_times[start]) if start < len(user_times) else 0.0
-        return onset_time
-
-    # No good window found — don't trim (conservative)
-    return 0.0
+        return start
+    return -1
 
 
 def _build_dtw_features(
@@ -558,7 +1040,7 @@ def _build_dtw_features(
 
     voicing = voiced.astype(float)
 
-    # RMS is already [0, 1] from extract_features normalisation
+    # RMS is already [0, 1] from extract_features_from_array normalisation
     rms = np.clip(rms_interp, 0.0, 1.0)
 
     return np.column_stack([
@@ -627,11 +1109,82 @@ def _check_path_sanity(
     }
 
 
+# In-memory dtypes for feature arrays loaded from JSON/.npz, matching what
+# extract_features_from_array produces. Unlisted arrays are float64.
+_ARRAY_DTYPES = {
+    "rms_values": np.float32,
+}
+
+
 def features_to_json(features: dict) -> str:
-    """Serialise features dict to a compact JSON string."""
-    return json.dumps(features, separators=(",", ":"))
+    """Serialise features dict to a compact JSON string.
+
+    This is the serialisation boundary: arrays only become lists here.
+    """
+    return json.dumps(
+        {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in features.items()},
+        separators=(",", ":"),
+    )
 
 
 def features_from_json(json_str: str) -> dict:
-    """Deserialise features dict from JSON string."""
-    return json.loads(json_str)
+    """Deserialise features dict from JSON string (lists become arrays)."""
+    return features_from_lists(json.loads(json_str))
+
+
+def features_from_lists(features: dict) -> dict:
+    """Convert the list values of a parsed features dict to numpy arrays.
+
+    null entries (unvoiced pitch in older JSON files) become NaN.
+    """
+    for key, value in features.items():
+        if isinstance(value, list):
+            features[key] = np.array(
+                [np.nan if v is None else v for v in value] if None in value else value,
+                dtype=_ARRAY_DTYPES.get(key, np.float64),
+            )
+    return features
+
+
+# Storage dtypes for features_to_npz. float16 keeps pitch within ~1 cent and
+# the 0-1 RMS envelope within 0.05%; timestamps need float32 (float16 can't
+# resolve 20 ms steps past ~40 s). Unlisted arrays are stored as float32.
+_NPZ_DTYPES = {
+    "pitch_values": np.float16,
+    "rms_values": np.float16,
+}
+
+
+def features_to_npz(features: dict) -> bytes:
+    """Serialise a features dict to compressed .npz bytes.
+
+    Arrays are stored in the dtypes of _NPZ_DTYPES; scalars such as duration_s
+    are stored as 0-d arrays. NaN pitch frames survive as NaN.
+    """
+    arrays = {}
+    for key, value in features.items():
+        if isinstance(value, (list, tuple, np.ndarray)):
+            arrays[key] = np.asarray(value, dtype=_NPZ_DTYPES.get(key, np.float32))
+        else:
+            arrays[key] = np.asarray(value)
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    return buf.getvalue()
+
+
+def features_from_npz(raw: bytes) -> dict:
+    """Deserialise features_to_npz output into a dict of arrays/scalars.
+
+    float16 storage is widened to the in-memory dtype (see _ARRAY_DTYPES);
+    arrays already in that dtype, as in the local features cache, are used
+    without a copy.
+    """
+    features = {}
+    with np.load(io.BytesIO(raw), allow_pickle=False) as npz:
+        for key in npz.files:
+            arr = npz[key]
+            if arr.ndim == 0:
+                features[key] = arr.item()
+            else:
+                features[key] = arr.astype(_ARRAY_DTYPES.get(key, np.float64), copy=False)
+    return features
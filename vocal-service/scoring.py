@@ -64,13 +64,12 @@ def _octave_num(note_str: Optional[str]) -> Optional[int]:
 
 def _median_note(pitch_values: list, pitch_times: list, t_start: float, t_end: float) -> Optional[str]:
     """Get the dominant note in a time window from pitch arrays."""
-    freqs = []
-    for freq, t in zip(pitch_values, pitch_times):
-        if t < t_start or t >= t_end:
-            continue
-        if freq is not None and not math.isnan(freq) and freq > 0:
-            freqs.append(freq)
-    if not freqs:
+    n = min(len(pitch_values), len(pitch_times))
+    freqs = np.asarray(pitch_values[:n], dtype=np.float64)
+    times = np.asarray(pitch_times[:n], dtype=np.float64)
+    freqs = freqs[(times >= t_start) & (times < t_end)]
+    freqs = freqs[freqs > 0]  # NaN (unvoiced) compares False
+    if len(freqs) == 0:
         return None
     return _hz_to_note(float(np.median(freqs)))
 
@@ -105,8 +104,8 @@ def _extract_notes(
     # This lets us split repeated same-pitch notes (e.g. Do4 Do4) that
     # have no silence gap but DO have distinct attacks.
     onset_frames: set[int] = set()
-    if onset_times and pitch_times:
-        pt_arr = np.array(pitch_times)
+    if onset_times is not None and len(onset_times) and len(pitch_times):
+        pt_arr = np.asarray(pitch_times)
         for ot in onset_times:
             idx = int(np.argmin(np.abs(pt_arr - ot)))
             # Widen tolerance to 50ms (pitch step is 20ms)
@@ -116,10 +115,13 @@ def _extract_notes(
     # Pre-build energy-dip detector: find pitch-frame indices where RMS
     # dips then rises (indicating a note re-attack even when pitch is constant).
     energy_dip_frames: set[int] = set()
-    if rms_values and rms_times and pitch_times:
-        rms_arr = np.array(rms_values)
-        rms_t_arr = np.array(rms_times)
-        pt_arr = np.array(pitch_times)
+    if (
+        rms_values is not None and len(rms_values)
+        and rms_times is not None and len(rms_times) and len(pitch_times)
+    ):
+        rms_arr = np.asarray(rms_values, dtype=np.float64)
+        rms_t_arr = np.asarray(rms_times)
+        pt_arr = np.asarray(pitch_times)
         # Find local minima in RMS (frames where energy drops >30% from neighbors)
         for ri in range(1, len(rms_arr) - 1):
             prev_e = rms_arr[ri - 1]
@@ -133,6 +135,7 @@ def _extract_notes(
                     energy_dip_frames.add(pidx)
 
     for frame_idx, (freq, t) in enumerate(zip(pitch_values, pitch_times)):
+        t = float(t)  # numpy scalars round() differently from floats
         if max_time_s is not None and t > max_time_s:
             break
 
@@ -188,7 +191,7 @@ def _extract_notes(
 
     # End last note
     if current_freqs and current_start is not None:
-        last_t = pitch_times[-1] if pitch_times else current_start
+        last_t = float(pitch_times[-1]) if len(pitch_times) else current_start
         dur = last_t - current_start
         if dur >= min_duration_s:
             median_hz = float(np.median(current_freqs))
@@ -241,7 +244,11 @@ def _align_notes(
 
     # Build DTW time mapping for timing offset calculation
     map_fn = None
-    if alignment and user_pitch_times and ref_pitch_times:
+    if (
+        alignment
+        and user_pitch_times is not None and len(user_pitch_times)
+        and ref_pitch_times is not None and len(ref_pitch_times)
+    ):
         path = alignment.get("path", [])
         dtw_ref_t: list[float] = []
         dtw_user_t: list[float] = []
@@ -598,14 +605,14 @@ def _compute_section_scores(alignment: dict, user_features: dict, ref_features:
     """Split the user recording timeline into 1-second segments
     and compute sub-scores for each."""
     user_times = user_features.get("pitch_times", [])
-    if not user_times:
+    if len(user_times) == 0:
         return []
 
     user_pitch_vals = user_features.get("pitch_values", [])
     ref_pitch_vals = ref_features.get("pitch_values", []) if ref_features else []
     ref_pitch_times = ref_features.get("pitch_times", []) if ref_features else []
 
-    duration = user_times[-1]
+    duration = float(user_times[-1])
     num_sections = max(1, round(duration / SECTION_DURATION_S))
     section_dur = duration / num_sections
     path = alignment["path"]
@@ -712,11 +719,11 @@ def _identify_problem_areas(
     so the frontend can play both clips side by side.
     """
     user_times = user_features.get("pitch_times", [])
-    if not user_times:
+    if len(user_times) == 0:
         return []
 
     ref_times = ref_features.get("pitch_times", []) if ref_features else []
-    duration = user_times[-1]
+    duration = float(user_times[-1])
     step = window_s / 2  # 50 % overlap
     path = alignment["path"]
 
@@ -748,7 +755,7 @@ def _identify_problem_areas(
 
             # Track the reference time for this aligned pair
             if r_idx < len(ref_times):
-                w_ref_times.append(ref_times[r_idx])
+                w_ref_times.append(float(ref_times[r_idx]))
 
         if w_pitch:
             avg_dev = float(np.mean(w_pitch))
@@ -827,7 +834,7 @@ def score_standalone(user_features: dict) -> dict:
     - Timing: regularity of onsets
     - Dynamics: energy range utilization
     """
-    pitch_values = np.array(user_features["pitch_values"])
+    pitch_values = np.asarray(user_features["pitch_values"], dtype=np.float64)
     # Filter out NaN (unvoiced)
     voiced = pitch_values[~np.isnan(pitch_values)]
 
@@ -851,7 +858,7 @@ def score_standalone(user_features: dict) -> dict:
         pitch_score = 30.0
 
     # Timing: onset regularity
-    onset_times = np.array(user_features["onset_times"])
+    onset_times = np.asarray(user_features["onset_times"])
     if len(onset_times) > 3:
         intervals = np.diff(onset_times)
         cv = float(np.std(intervals) / np.mean(intervals)) if np.mean(intervals) > 0 else 1.0
@@ -863,7 +870,7 @@ def score_standalone(user_features: dict) -> dict:
         timing_score = 50.0
 
     # Dynamics: energy range and variation
-    rms_values = np.array(user_features["rms_values"])
+    rms_values = np.asarray(user_features["rms_values"], dtype=np.float64)
     if len(rms_values) > 10:
         rms_cv = float(np.std(rms_values) / np.mean(rms_values)) if np.mean(rms_values) > 0 else 0
         # Good dynamics = some variation (not flat, not chaotic)
@@ -884,8 +891,8 @@ def score_standalone(user_features: dict) -> dict:
     if duration > 0:
         num_sections = max(1, round(duration / SECTION_DURATION_S))
         section_dur = duration / num_sections
-        rms_times = np.array(user_features["rms_times"])
-        pitch_times = np.array(user_features["pitch_times"])
+        rms_times = np.asarray(user_features["rms_times"])
+        pitch_times = np.asarray(user_features["pitch_times"])
 
         for sec_idx in range(num_sections):
             t_start = sec_idx * section_dur
@@ -0,0 +1,86 @@
+"""Regression tests for the banded DTW alignment."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("parselmouth")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import processing  # noqa: E402
+
+
+def _features(pitch: np.ndarray) -> dict:
+    n = len(pitch)
+    times = np.arange(n) * 0.02
+    rms_times = np.arange(n) * 0.0232
+    return {
+        "pitch_values": pitch,
+        "pitch_times": times,
+        "onset_times": np.empty(0),
+        "rms_values": np.full(n, 0.5, dtype=np.float32),
+        "rms_times": rms_times,
+        "duration_s": round(n * 0.02, 4),
+    }
+
+
+@pytest.mark.parametrize("n, m, window", [(4, 57, 2), (3, 3000, 50), (57, 4, 2), (1, 200, 1)])
+def test_banded_dtw_reaches_end_cell_for_skewed_lengths(n, m, window):
+    rng = np.random.default_rng(n * m)
+    x = rng.standard_normal((n, 3))
+    y = rng.standard_normal((m, 3))
+
+    distance, path = processing._banded_dtw(x, y, window)
+
+    assert np.isfinite(distance)
+    assert path[0] == (0, 0)
+    assert path[-1] == (n - 1, m - 1)
+    for (i0, j0), (i1, j1) in zip(path, path[1:]):
+        assert (i1 - i0, j1 - j0) in {(1, 1), (1, 0), (0, 1)}
+
+
+def test_align_short_recording_against_long_reference():
+    # 4.14 s take voiced only in its last frames: the onset trim leaves a
+    # handful of user frames against 60 s of reference.
+    user_pitch = np.full(207, np.nan)
+    user_pitch[-3:] = 220.0
+    ref_pitch = 220.0 * 2 ** (np.sin(np.arange(3000) / 40.0) / 6)
+
+    alignment = processing.align_features(_features(user_pitch), _features(ref_pitch))
+
+    assert alignment["path"]
+    assert np.isfinite(alignment["dtw_distance"])
+
+
+def test_kernel_returns_empty_path_when_band_cannot_reach_end():
+    # Called without _banded_dtw's window clamp: rows' bands don't touch, so
+    # the kernel must report no path rather than backtrack out of bounds.
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((4, 3))
+    y = rng.standard_normal((57, 3))
+    lo = np.array([int(i * 56 / 3 + 0.5) - 2 for i in range(4)], dtype=np.int64)
+
+    assert processing._centre_path_cost(x, y, lo, 2) == np.inf
+    distance, path_i, path_j = processing._banded_dtw_kernel(x, y, 2)
+
+    assert distance == np.inf
+    assert len(path_i) == 0 and len(path_j) == 0
+
+
+def test_kernel_matches_full_dtw_when_band_covers_matrix():
+    rng = np.random.default_rng(1)
+    x = rng.standard_normal((30, 3))
+    y = rng.standard_normal((45, 3))
+    d = np.linalg.norm(x[:, None, :] - y[None, :, :], axis=2)
+    acc = np.full((31, 46), np.inf)
+    acc[0, 0] = 0.0
+    for i in range(1, 31):
+        for j in range(1, 46):
+            acc[i, j] = d[i - 1, j - 1] + min(acc[i - 1, j - 1], acc[i - 1, j], acc[i, j - 1])
+
+    distance, path = processing._banded_dtw(x, y, 45)
+
+    assert distance == pytest.approx(acc[30, 45])
+    assert sum(d[i, j] for i, j in path) == pytest.approx(distance)